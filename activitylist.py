@@ -0,0 +1,264 @@
+import sys
+import customtkinter as ctk
+
+from weeklylog import ACTIVITY_TYPES, parse_time, format_minutes
+
+
+class ActivityListView(ctk.CTkFrame):
+    """
+    A scrollable list of activity rows for a single day.
+
+    Only the rows that fit into the visible area are materialized. The row
+    widgets form a small pool that is recycled while scrolling: each row is
+    rebound to the activity at its position instead of being rebuilt, so
+    memory and redraw cost depend on the height of the list, not on the
+    number of activities of the day.
+
+    Each row is a dict with the widgets 'frame', 'type', 'start', 'end' and
+    'note', the currently bound model 'activity' (None if unused) and
+    'parsed', the last parsed text and minutes of each time entry.
+    """
+
+    def __init__(self, master, on_row_changed, on_row_edited, on_remove, height=200, **kwargs):
+        """
+        Args:
+            master: The parent widget.
+            on_row_changed (callable): Called with a row when a field was committed
+                (focus left a time entry or the type was changed).
+            on_row_edited (callable): Called with a row after every key stroke.
+            on_remove (callable): Called with the id and the position of the activity to remove.
+            height (int): The initial height of the list.
+        """
+        super().__init__(master, height=height, **kwargs)
+        self.on_row_changed = on_row_changed
+        self.on_row_edited = on_row_edited
+        self.on_remove = on_remove
+
+        self.day = None
+        self.order = []  # The activities of the day in display order
+        self.first = 0  # Index of the activity shown in the first row
+        self.rows = []
+        self.row_height = 40  # Estimated until the first row is measured
+        self.visible_rows = 1
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+
+        # The rows are clipped to the size of this frame instead of enlarging it
+        self.rows_frame = ctk.CTkFrame(self, fg_color="transparent")
+        self.rows_frame.grid(row=0, column=0, sticky="nsew")
+        self.rows_frame.grid_columnconfigure(0, weight=1)
+        self.rows_frame.grid_propagate(False)
+        self.rows_frame.bind("<Configure>", self.on_resize)
+
+        self.scrollbar = ctk.CTkScrollbar(self, command=self.on_scrollbar)
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+        if sys.platform.startswith("win") or sys.platform == "darwin":
+            self.bind_all("<MouseWheel>", self.on_mouse_wheel, add=True)
+        else:
+            self.bind_all("<Button-4>", self.on_mouse_wheel, add=True)
+            self.bind_all("<Button-5>", self.on_mouse_wheel, add=True)
+
+    def set_day(self, day):
+        """
+        Binds the list to a day of the model and shows its first activities.
+
+        Args:
+            day (Day): The day whose activities are shown.
+        """
+        self.day = day
+        self.first = 0
+        self.refresh()
+
+    def refresh(self, force=False):
+        """
+        Re-reads all activities of the bound day, e.g. after the day was
+        cleared or reloaded, and rebinds the visible rows.
+
+        Args:
+            force (bool): Also rewrite rows whose activity did not change, e.g.
+                after the activities were edited outside of the GUI.
+        """
+        self.order = list(self.day.activities.values()) if self.day else []
+        self.scroll_to(self.first, force)
+
+    def insert(self, activity, position):
+        """
+        Shows an activity that was inserted into the bound day, without re-reading the other activities.
+
+        Args:
+            activity (Activity): The inserted activity.
+            position (int): Its position in the day.
+        """
+        self.order.insert(position, activity)
+        self.scroll_to(self.first)
+
+    def remove(self, position):
+        """
+        Drops an activity that was removed from the bound day, without re-reading the other activities.
+
+        Args:
+            position (int): The position the activity had in the day.
+        """
+        del self.order[position]
+        self.scroll_to(self.first)
+
+    def scroll_to(self, first, force=False):
+        """
+        Shows the activities starting at the given index.
+
+        Args:
+            first (int): The index of the activity to show in the first row.
+            force (bool): Also rewrite rows whose activity did not change.
+        """
+        max_first = max(0, len(self.order) - self.visible_rows)
+        self.first = max(0, min(int(first), max_first))
+        for i, row in enumerate(self.rows):
+            index = self.first + i
+            self.bind_row(row, self.order[index] if index < len(self.order) else None, force)
+        self.update_scrollbar()
+
+    def scroll_to_end(self):
+        """Scrolls so that the last activity is visible."""
+        self.scroll_to(len(self.order))
+
+    def create_row(self):
+        """
+        Creates one recyclable row of activity widgets.
+
+        Returns:
+            dict: The widgets of the row.
+        """
+        row_frame = ctk.CTkFrame(self.rows_frame, fg_color="transparent")
+        row_frame.grid_columnconfigure((0, 1, 2, 3), weight=1)
+        row = {'frame': row_frame, 'activity': None, 'parsed': {}}
+
+        # Type dropdown
+        type_dropdown = ctk.CTkOptionMenu(row_frame, values=ACTIVITY_TYPES, command=lambda value: self.on_row_changed(row))
+        type_dropdown.grid(row=0, column=0, padx=5, pady=5, sticky="ew")
+
+        # Start time entry
+        start_entry = ctk.CTkEntry(row_frame, placeholder_text="Startzeit (HH:MM)")
+        start_entry.grid(row=0, column=1, padx=5, pady=5, sticky="ew")
+        start_entry.bind("<FocusOut>", lambda event: self.on_row_changed(row))
+
+        # End time entry
+        end_entry = ctk.CTkEntry(row_frame, placeholder_text="Endzeit (HH:MM)")
+        end_entry.grid(row=0, column=2, padx=5, pady=5, sticky="ew")
+        end_entry.bind("<FocusOut>", lambda event: self.on_row_changed(row))
+
+        # Note entry
+        note_entry = ctk.CTkEntry(row_frame, placeholder_text="Notiz")
+        note_entry.grid(row=0, column=3, padx=5, pady=5, sticky="ew")
+
+        # Remove button
+        remove_button = ctk.CTkButton(row_frame, text="X", width=30, command=lambda: self.on_remove(row['activity'].id, self.first + self.rows.index(row)))
+        remove_button.grid(row=0, column=4, padx=5, pady=5)
+
+        # Keep the model in sync while typing, so that saving never misses an edit
+        for entry in (start_entry, end_entry, note_entry):
+            entry.bind("<KeyRelease>", lambda event: self.on_row_edited(row))
+
+        row.update({
+            'type': type_dropdown,
+            'start': start_entry,
+            'end': end_entry,
+            'note': note_entry
+        })
+        return row
+
+    def bind_row(self, row, activity, force=False):
+        """
+        Shows an activity in a recycled row, or hides the row if activity is None.
+        """
+        if activity is row['activity'] and activity is not None and not force:
+            return
+        row['activity'] = activity
+        if activity is None:
+            row['frame'].grid_remove()
+            return
+
+        row['type'].set(activity.type)
+        for field, minutes in (('start', activity.start_minute), ('end', activity.end_minute)):
+            text = format_minutes(minutes)
+            row[field].delete(0, ctk.END)
+            if text:
+                row[field].insert(0, text)
+            row['parsed'][field] = (text, minutes)
+        row['note'].delete(0, ctk.END)
+        if activity.note:
+            row['note'].insert(0, activity.note)
+        row['frame'].grid()
+
+    def time_of(self, row, field):
+        """
+        Returns the time entered in the 'start' or 'end' entry of a row in
+        minutes (None if invalid). The text is only parsed again after it changed.
+        """
+        text = row[field].get()
+        parsed = row['parsed'].get(field)
+        if parsed is None or parsed[0] != text:
+            parsed = row['parsed'][field] = (text, parse_time(text))
+        return parsed[1]
+
+    def on_resize(self, event):
+        """
+        Adjusts the size of the row pool to the new height of the list.
+        """
+        if not self.rows:
+            # Measure the height of a row once
+            row = self.create_row()
+            row['frame'].grid(row=0, column=0, padx=5, pady=5, sticky="ew")
+            row['frame'].update_idletasks()
+            self.row_height = row['frame'].winfo_reqheight() + 10
+            self.rows.append(row)
+
+        self.visible_rows = max(1, event.height // self.row_height)
+        # One additional, partly visible row at the bottom
+        while len(self.rows) < self.visible_rows + 1:
+            row = self.create_row()
+            row['frame'].grid(row=len(self.rows), column=0, padx=5, pady=5, sticky="ew")
+            row['frame'].grid_remove()
+            self.rows.append(row)
+        while len(self.rows) > self.visible_rows + 1:
+            self.rows.pop()['frame'].destroy()
+
+        self.scroll_to(self.first)
+
+    def update_scrollbar(self):
+        """Updates the scrollbar to the visible part of the list."""
+        if not self.order:
+            self.scrollbar.set(0.0, 1.0)
+            return
+        total = len(self.order)
+        self.scrollbar.set(self.first / total, min(1.0, (self.first + self.visible_rows) / total))
+
+    def on_scrollbar(self, action, value, unit=None):
+        """Handles the 'moveto' and 'scroll' commands of the scrollbar."""
+        if action == 'moveto':
+            self.scroll_to(round(float(value) * len(self.order)))
+        else:
+            step = self.visible_rows if unit == 'pages' else 1
+            self.scroll_to(self.first + int(value) * step)
+
+    def on_mouse_wheel(self, event):
+        """Scrolls the list if the mouse wheel was used above one of its widgets."""
+        if not self.contains(event.widget):
+            return
+        if sys.platform.startswith("win"):
+            delta = -int(event.delta / 120)
+        elif sys.platform == "darwin":
+            delta = -event.delta
+        else:
+            delta = -1 if event.num == 4 else 1
+        self.scroll_to(self.first + delta)
+
+    def contains(self, widget):
+        """Returns True if the widget is this list or one of its descendants."""
+        while widget is not None:
+            if widget is self:
+                return True
+            if widget is self.scrollbar:
+                return False  # The scrollbar handles the wheel itself
+            widget = getattr(widget, 'master', None)
+        return False
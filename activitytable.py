@@ -0,0 +1,135 @@
+import numpy as np
+
+from weeklylog import DAYS_OF_WEEK, BREAK_TYPE, TYPE_CODES
+
+# The type code of activity types that are not in TYPE_CODES
+UNKNOWN_TYPE = -1
+
+
+class ActivityTable:
+    """
+    A columnar store of many activities for fleet-wide analytics.
+
+    Every column is a NumPy array with one entry per activity: start and end
+    time (hours), the type code from TYPE_CODES, the day index into
+    DAYS_OF_WEEK, the week id and the technician id (an index into
+    `monteurs`). Totals are computed with vectorized operations instead of
+    looping over one dict per activity; each activity takes 26 bytes.
+
+    Only activities with valid times are stored, as in the JSON format.
+    """
+
+    def __init__(self, start, end, type_code, day, week, monteur, monteurs):
+        """
+        Args:
+            start, end (array): Start and end times in hours.
+            type_code (array): The type codes from TYPE_CODES (UNKNOWN_TYPE for other types).
+            day (array): The day indices into DAYS_OF_WEEK.
+            week (array): The week ids.
+            monteur (array): The technician ids, indices into monteurs.
+            monteurs (list): The technician names.
+        """
+        self.start = np.asarray(start, dtype=np.float64)
+        self.end = np.asarray(end, dtype=np.float64)
+        self.type_code = np.asarray(type_code, dtype=np.int8)
+        self.day = np.asarray(day, dtype=np.int8)
+        self.week = np.asarray(week, dtype=np.int32)
+        self.monteur = np.asarray(monteur, dtype=np.int32)
+        self.monteurs = list(monteurs)
+
+    @classmethod
+    def from_weeks(cls, weeks):
+        """
+        Builds the table from Week models. The weeks are numbered in the given order.
+
+        Args:
+            weeks (iterable): The Week objects.
+
+        Returns:
+            ActivityTable: The table of all valid activities of the weeks.
+        """
+        columns = ([], [], [], [], [], [])
+        monteur_ids = {}
+        for week_id, week in enumerate(weeks):
+            monteur_id = monteur_ids.setdefault(week.monteur, len(monteur_ids))
+            for day_index, day_en in enumerate(DAYS_OF_WEEK):
+                for activity in week.days[day_en].activities.values():
+                    if not activity.is_valid():
+                        continue
+                    for column, value in zip(columns, (activity.start, activity.end,
+                                                       TYPE_CODES.get(activity.type, UNKNOWN_TYPE),
+                                                       day_index, week_id, monteur_id)):
+                        column.append(value)
+        return cls(*columns, monteurs=list(monteur_ids))
+
+    @classmethod
+    def from_archive(cls, archive):
+        """
+        Builds the table directly from the rows of a week archive, without
+        creating Week or Activity objects. The week ids are the archive ids.
+
+        Args:
+            archive (WeekArchive): The archive to read.
+
+        Returns:
+            ActivityTable: The table of all archived activities.
+        """
+        rows = archive.connection.execute(
+            'SELECT a.start, a."end", a.type, a.day, a.week_id, w.monteur '
+            'FROM activities a JOIN weeks w ON w.id = a.week_id'
+        ).fetchall()
+        if not rows:
+            return cls([], [], [], [], [], [], [])
+        start, end, types, day, week, monteur = zip(*rows)
+        type_code = [TYPE_CODES.get(activity_type, UNKNOWN_TYPE) for activity_type in types]
+        monteurs, monteur_ids = np.unique(np.array(monteur), return_inverse=True)
+        return cls(start, end, type_code, day, week, monteur_ids, monteurs.tolist())
+
+    def __len__(self):
+        return len(self.start)
+
+    def nbytes(self):
+        """Returns the memory used by the columns in bytes."""
+        return sum(column.nbytes for column in (self.start, self.end, self.type_code, self.day, self.week, self.monteur))
+
+    def durations(self):
+        """Returns the duration of each activity in hours; negative durations count as 0."""
+        return np.maximum(self.end - self.start, 0)
+
+    def working_durations(self):
+        """Returns the working hours of each activity, i.e. the durations with breaks ('P') set to 0."""
+        return np.where(self.type_code == TYPE_CODES[BREAK_TYPE], 0, self.durations())
+
+    def working_hours(self):
+        """Returns the total working hours of all activities, excluding breaks ('P')."""
+        return float(self.working_durations().sum())
+
+    def hours_by_type(self):
+        """
+        Returns:
+            dict: The total hours per activity type, including breaks.
+        """
+        known = self.type_code >= 0
+        sums = np.bincount(self.type_code[known], weights=self.durations()[known], minlength=len(TYPE_CODES))
+        return {activity_type: float(sums[code]) for activity_type, code in TYPE_CODES.items()}
+
+    def working_hours_by(self, key, minlength=0):
+        """
+        Sums the working hours (excluding breaks) per value of a column.
+
+        Args:
+            key (str): The column to group by: 'week', 'monteur' or 'day'.
+            minlength (int): The minimum length of the result.
+
+        Returns:
+            ndarray: The working hours, indexed by the value of the column.
+        """
+        return np.bincount(getattr(self, key), weights=self.working_durations(), minlength=minlength)
+
+    def working_hours_by_monteur(self):
+        """
+        Returns:
+            dict: The total working hours per technician name.
+        """
+        sums = self.working_hours_by('monteur', minlength=len(self.monteurs))
+        return dict(zip(self.monteurs, sums.tolist()))
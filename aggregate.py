@@ -0,0 +1,166 @@
+"""
+Sums up working hours and kilometers over many week files.
+
+Usage:
+    python aggregate.py WOCHEN [WOCHEN ...] [--nach woche|monat|jahr] [--csv DATEI] [--json DATEI] [--workers N]
+
+WOCHEN is a directory with week JSON files (as written by "In JSON-Datei
+speichern") or a glob pattern. The files are read and summed up in a pool
+of worker processes, each of which only returns its partial sums, so the
+weeks are never held in memory at the same time.
+
+The working hours exclude breaks ('P'), as in "Wochen-Arbeitsstunden
+berechnen". Each day is counted in the month it falls in, so a week that
+spans two months contributes to both. Files written before the start date
+was saved get it from their file name if it contains a date (e.g.
+"woche_08.01.2024.json" or "2024-01-08.json") or an ISO week (e.g.
+"2024_KW02.json"); the remaining files without a start date cannot be
+assigned to a month and are skipped and counted.
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import csv
+import datetime
+import json
+import sys
+import time
+
+from weeklylog import ACTIVITY_TYPES, DAYS_OF_WEEK, read_week, find_week_files, start_date_of
+
+# The summed values of each group: working hours, kilometers and the hours per activity type
+VALUES = ['stunden', 'km'] + [f"stunden_{activity_type}" for activity_type in ACTIVITY_TYPES]
+
+# The key columns of the rollups; 'jahr' is the ISO year for weeks and the calendar year otherwise
+GROUPINGS = {
+    'woche': ['monteur', 'jahr', 'kw'],
+    'monat': ['monteur', 'monat'],
+    'jahr': ['monteur', 'jahr']
+}
+
+def aggregate_files(files):
+    """
+    Sums up a chunk of week files per technician, ISO week and month. Runs in a worker process.
+
+    Args:
+        files (list): The week JSON files of the chunk.
+
+    Returns:
+        tuple: The partial sums as a dict from (monteur, ISO year, ISO week, month)
+            to a list of VALUES, and the list of skipped files with the reason.
+    """
+    sums = {}
+    skipped = []
+    for file_path in files:
+        try:
+            week = read_week(file_path)
+            start_date = start_date_of(week, file_path)
+        except (IOError, ValueError) as e:
+            skipped.append((file_path, str(e)))
+            continue
+
+        iso_year, week_number = start_date.isocalendar()[:2]
+        for offset, day_en in enumerate(DAYS_OF_WEEK):
+            day = week.days[day_en]
+            if not day.activities and not day.km:
+                continue
+            month = (start_date + datetime.timedelta(days=offset)).strftime("%Y-%m")
+            values = sums.setdefault((week.monteur, iso_year, week_number, month), [0.0] * len(VALUES))
+            values[0] += day.working_hours()
+            values[1] += day.km
+            for activity in day.activities.values():
+                if activity.type in ACTIVITY_TYPES and activity.is_valid():
+                    values[2 + ACTIVITY_TYPES.index(activity.type)] += max(activity.end_minute - activity.start_minute, 0) / 60
+    return sums, skipped
+
+
+def merge(total, partial):
+    """Adds partial sums to the total sums in place."""
+    for key, values in partial.items():
+        if key in total:
+            total[key] = [a + b for a, b in zip(total[key], values)]
+        else:
+            total[key] = values
+
+
+def aggregate_all(files, workers=None, chunk_size=64):
+    """
+    Sums up all week files in a process pool. The files are handed to the
+    workers in chunks, and only the partial sums are sent back and merged.
+
+    Args:
+        files (list): The week JSON files.
+        workers (int, optional): The number of worker processes (default: all cores).
+        chunk_size (int): The number of files per task.
+
+    Returns:
+        tuple: The sums per (monteur, ISO year, ISO week, month) and the number of skipped files.
+    """
+    total = {}
+    skipped_files = 0
+    chunks = [files[i:i + chunk_size] for i in range(0, len(files), chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for partial, skipped in executor.map(aggregate_files, chunks):
+            merge(total, partial)
+            skipped_files += len(skipped)
+            for file_path, reason in skipped:
+                print(f"{file_path}: übersprungen ({reason})", file=sys.stderr)
+    return total, skipped_files
+
+
+def rollup(sums, grouping):
+    """
+    Groups the weekly sums by the key columns of a rollup.
+
+    Args:
+        sums (dict): The sums per (monteur, ISO year, ISO week, month).
+        grouping (str): One of the keys of GROUPINGS.
+
+    Returns:
+        list: One dict per group with the key columns and VALUES, sorted by the key.
+    """
+    groups = {}
+    for (monteur, iso_year, week_number, month), values in sums.items():
+        row = {'monteur': monteur, 'jahr': int(month[:4]) if grouping == 'jahr' else iso_year,
+               'kw': week_number, 'monat': month}
+        key = tuple(row[column] for column in GROUPINGS[grouping])
+        merge(groups, {key: values})
+    return [dict(zip(GROUPINGS[grouping] + VALUES, key + tuple(round(value, 2) for value in values)))
+            for key, values in sorted(groups.items())]
+
+
+def write_csv(rows, grouping, file):
+    """Writes the rows of a rollup as CSV with a header line."""
+    writer = csv.DictWriter(file, fieldnames=GROUPINGS[grouping] + VALUES)
+    writer.writeheader()
+    writer.writerows(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Arbeitsstunden und Kilometer über viele Wochen summieren")
+    parser.add_argument("weeks", nargs="+", help="Verzeichnisse, Dateien oder Glob-Muster mit Wochen-JSON-Dateien")
+    parser.add_argument("--nach", choices=list(GROUPINGS), default="monat", help="Gruppierung (Standard: monat)")
+    parser.add_argument("--csv", help="CSV-Datei (Standard: Ausgabe auf der Konsole)")
+    parser.add_argument("--json", help="JSON-Datei")
+    parser.add_argument("--workers", type=int, help="Anzahl der Prozesse (Standard: alle Kerne)")
+    args = parser.parse_args()
+
+    files = find_week_files(args.weeks)
+    if not files:
+        parser.error("keine Wochen-Dateien gefunden")
+
+    start_time = time.perf_counter()
+    sums, skipped_files = aggregate_all(files, args.workers)
+    rows = rollup(sums, args.nach)
+    elapsed = time.perf_counter() - start_time
+
+    if args.csv:
+        with open(args.csv, 'w', encoding='utf-8', newline='') as f:
+            write_csv(rows, args.nach, f)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, indent=4, ensure_ascii=False)
+    if not args.csv and not args.json:
+        write_csv(rows, args.nach, sys.stdout)
+    print(f"{len(files)} Wochen in {elapsed:.2f} s zusammengefasst ({len(files) / elapsed:.0f} Wochen/s)", file=sys.stderr)
+    if skipped_files:
+        print(f"Achtung: {skipped_files} von {len(files)} Dateien übersprungen, siehe oben", file=sys.stderr)
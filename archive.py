@@ -0,0 +1,396 @@
+"""
+A local archive of many weeks in a single SQLite database.
+
+Usage:
+    python archive.py ARCHIV.db import WOCHEN [WOCHEN ...] [--monteur NAME]
+    python archive.py ARCHIV.db list [--monteur NAME] [--von TT.MM.JJJJ] [--bis TT.MM.JJJJ] [--woche N]
+    python archive.py ARCHIV.db export ID DATEI.json
+    python archive.py ARCHIV.db wer TT.MM.JJJJ HH:MM [--typ F]
+    python archive.py ARCHIV.db konflikte [--monteur NAME]
+
+WOCHEN is a directory with week JSON files (as written by "In JSON-Datei
+speichern") or a glob pattern. Files written before the start date was
+saved get it from the date or ISO week in their file name, as in
+aggregate.py, and the technician given with --monteur. Exported files have
+the same format and can be opened with "Daten aus JSON laden".
+"""
+import argparse
+import datetime
+import json
+import sqlite3
+import time
+
+from occupancy import day_occupancy, heatmap, hours_of, slot_of, split, join
+from weeklylog import Week, Day, Activity, DAYS_OF_WEEK, read_week, find_week_files, start_date_of
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS weeks (
+    id INTEGER PRIMARY KEY,
+    monteur TEXT NOT NULL,
+    start_date TEXT,  -- ISO date of the Monday (YYYY-MM-DD), sortable and comparable
+    end_date TEXT,
+    iso_year INTEGER,
+    week_number INTEGER,
+    date_range TEXT NOT NULL,
+    UNIQUE (monteur, start_date)
+);
+CREATE TABLE IF NOT EXISTS days (
+    week_id INTEGER NOT NULL REFERENCES weeks(id) ON DELETE CASCADE,
+    day INTEGER NOT NULL,  -- Index into DAYS_OF_WEEK
+    total_hours REAL NOT NULL,
+    km REAL NOT NULL,
+    PRIMARY KEY (week_id, day)
+);
+CREATE TABLE IF NOT EXISTS activities (
+    week_id INTEGER NOT NULL REFERENCES weeks(id) ON DELETE CASCADE,
+    day INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    start REAL NOT NULL,
+    "end" REAL NOT NULL,
+    note TEXT NOT NULL,
+    PRIMARY KEY (week_id, day, position)
+);
+CREATE TABLE IF NOT EXISTS occupancy (
+    week_id INTEGER NOT NULL REFERENCES weeks(id) ON DELETE CASCADE,
+    day INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    low INTEGER NOT NULL,  -- Quarter-hour slots 0-47 as bits, see occupancy.py
+    high INTEGER NOT NULL,  -- Slots 48-95
+    PRIMARY KEY (week_id, day, type)
+);
+CREATE INDEX IF NOT EXISTS weeks_by_monteur ON weeks (monteur, start_date);
+CREATE INDEX IF NOT EXISTS weeks_by_week_number ON weeks (iso_year, week_number);
+CREATE INDEX IF NOT EXISTS weeks_by_date ON weeks (start_date, end_date);
+"""
+
+
+def parse_date(date_str):
+    """
+    Converts a date in the format 'TT.MM.JJJJ' into a date.
+
+    Returns:
+        date: The parsed date, or None if the text is empty or invalid.
+    """
+    try:
+        return datetime.datetime.strptime(date_str, "%d.%m.%Y").date()
+    except (TypeError, ValueError):
+        return None
+
+
+class WeekArchive:
+    """
+    Stores weeks, their days and activities in an indexed SQLite database.
+
+    A week is identified by its technician and its start date; saving a week
+    that is already archived replaces it. Weeks can be looked up by technician,
+    ISO week and date range through indexes, so opening one of thousands of
+    archived weeks takes milliseconds.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): The database file. It is created if it does not exist.
+        """
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def save_week(self, week, commit=True):
+        """
+        Saves a week, replacing an archived week of the same technician and start date.
+        Activities with invalid times are skipped, as in the JSON format.
+
+        Args:
+            week (Week): The week to save.
+            commit (bool): Commit the transaction; bulk imports commit once at the end.
+
+        Returns:
+            int: The id of the week in the archive.
+
+        Raises:
+            ValueError: If the week has no valid start date (e.g. a file written before
+                the metadata was saved). Such a week could not be replaced later, so
+                every import would add it again.
+        """
+        start_date = parse_date(week.start_date)
+        if start_date is None:
+            raise ValueError("kein gültiges Startdatum")
+        end_date = start_date + datetime.timedelta(days=6)
+        iso_year, week_number = start_date.isocalendar()[:2]
+
+        cursor = self.connection.cursor()
+        cursor.execute("DELETE FROM weeks WHERE monteur = ? AND start_date = ?", (week.monteur, start_date.isoformat()))
+        cursor.execute(
+            "INSERT INTO weeks (monteur, start_date, end_date, iso_year, week_number, date_range) VALUES (?, ?, ?, ?, ?, ?)",
+            (week.monteur, start_date.isoformat(), end_date.isoformat(), iso_year, week_number, week.date_range)
+        )
+        week_id = cursor.lastrowid
+        cursor.executemany(
+            "INSERT INTO days (week_id, day, total_hours, km) VALUES (?, ?, ?, ?)",
+            [(week_id, i, week.days[day_en].total_hours, week.days[day_en].km) for i, day_en in enumerate(DAYS_OF_WEEK)]
+        )
+        cursor.executemany(
+            'INSERT INTO activities (week_id, day, position, type, start, "end", note) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            [(week_id, i, position, activity.type, activity.start, activity.end, activity.note)
+             for i, day_en in enumerate(DAYS_OF_WEEK)
+             for position, activity in enumerate(a for a in week.days[day_en].activities.values() if a.is_valid())]
+        )
+        self.save_occupancy(cursor, week_id, week)
+        if commit:
+            self.connection.commit()
+        return week_id
+
+    def save_occupancy(self, cursor, week_id, week):
+        """Stores the quarter-hour bitmaps of the activity types for each day of a week."""
+        cursor.executemany(
+            "INSERT OR REPLACE INTO occupancy (week_id, day, type, low, high) VALUES (?, ?, ?, ?, ?)",
+            [(week_id, i, activity_type) + split(mask)
+             for i, day_en in enumerate(DAYS_OF_WEEK)
+             for activity_type, mask in day_occupancy(week.days[day_en]).items()]
+        )
+
+    def rebuild_occupancy(self):
+        """Recomputes the bitmaps of all archived weeks, e.g. for weeks archived before they existed."""
+        with self.connection:
+            cursor = self.connection.cursor()
+            cursor.execute("DELETE FROM occupancy")
+            for (week_id,) in self.connection.execute("SELECT id FROM weeks").fetchall():
+                self.save_occupancy(cursor, week_id, self.load_week(week_id))
+
+    def who_at(self, date, hours, activity_type=None):
+        """
+        Finds the technicians whose activities cover a point in time, e.g. who
+        was driving ('F') on a date at 14:15, with one bit test per archived day.
+
+        Args:
+            date (date): The day.
+            hours (float): The time in hours, e.g. 14.25.
+            activity_type (str, optional): Only this activity type.
+
+        Returns:
+            list: Tuples of technician and activity type.
+        """
+        slot = slot_of(hours)
+        column, bit = ("low", 1 << slot) if slot < 48 else ("high", 1 << (slot - 48))
+        monday = date - datetime.timedelta(days=date.weekday())
+        query = (f"SELECT w.monteur, o.type FROM occupancy o JOIN weeks w ON w.id = o.week_id "
+                 f"WHERE w.start_date = ? AND o.day = ? AND (o.{column} & ?) != 0")
+        parameters = [monday.isoformat(), date.weekday(), bit]
+        if activity_type is not None:
+            query += " AND o.type = ?"
+            parameters.append(activity_type)
+        return self.connection.execute(query + " ORDER BY w.monteur", parameters).fetchall()
+
+    def heatmap(self, activity_type, monteur=None, date_from=None, date_to=None):
+        """
+        Counts, for each quarter hour of the day, on how many archived days an
+        activity type occupied it.
+
+        Args:
+            activity_type (str): The activity type, e.g. 'F'.
+            monteur (str, optional): Only the days of this technician.
+            date_from, date_to (date, optional): Only weeks overlapping this period.
+
+        Returns:
+            ndarray: The 96 counts, one per quarter hour.
+        """
+        query = "SELECT o.low, o.high FROM occupancy o JOIN weeks w ON w.id = o.week_id WHERE o.type = ?"
+        parameters = [activity_type]
+        for condition, value in (("w.monteur = ?", monteur),
+                                 ("w.end_date >= ?", date_from.isoformat() if date_from else None),
+                                 ("w.start_date <= ?", date_to.isoformat() if date_to else None)):
+            if value is not None:
+                query += f" AND {condition}"
+                parameters.append(value)
+        rows = self.connection.execute(query, parameters).fetchall()
+        return heatmap(*zip(*rows)) if rows else heatmap([], [])
+
+    def find_conflicts(self, monteur=None):
+        """
+        Finds days on which two activity types of the same technician occupy the same quarter hours.
+
+        Args:
+            monteur (str, optional): Only the days of this technician.
+
+        Returns:
+            list: Tuples of technician, date range of the week, day name, both types and the shared bitmap.
+        """
+        query = ("SELECT w.monteur, w.date_range, a.day, a.type, b.type, a.low & b.low, a.high & b.high "
+                 "FROM occupancy a JOIN occupancy b ON b.week_id = a.week_id AND b.day = a.day AND b.type > a.type "
+                 "JOIN weeks w ON w.id = a.week_id "
+                 "WHERE ((a.low & b.low) != 0 OR (a.high & b.high) != 0)")
+        parameters = []
+        if monteur is not None:
+            query += " AND w.monteur = ?"
+            parameters.append(monteur)
+        return [(name, date_range, DAYS_OF_WEEK[day], type_a, type_b, join(low, high))
+                for name, date_range, day, type_a, type_b, low, high in self.connection.execute(query, parameters)]
+
+    def load_week(self, week_id):
+        """
+        Reads a week from the archive.
+
+        Args:
+            week_id (int): The id of the week.
+
+        Returns:
+            Week: The loaded week.
+
+        Raises:
+            KeyError: If there is no week with this id.
+        """
+        row = self.connection.execute(
+            "SELECT monteur, start_date, week_number, date_range FROM weeks WHERE id = ?", (week_id,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(week_id)
+        monteur, start_date, week_number, date_range = row
+        start_date = datetime.date.fromisoformat(start_date).strftime('%d.%m.%Y') if start_date else ""
+        week = Week(date_range, monteur, week_number if week_number is not None else "", start_date)
+
+        activities = {i: [] for i in range(len(DAYS_OF_WEEK))}
+        for day, activity_type, start, end, note in self.connection.execute(
+                'SELECT day, type, start, "end", note FROM activities WHERE week_id = ? ORDER BY day, position', (week_id,)):
+            activities[day].append(Activity(activity_type, start, end, note))
+        for day, total_hours, km in self.connection.execute(
+                "SELECT day, total_hours, km FROM days WHERE week_id = ?", (week_id,)):
+            week.days[DAYS_OF_WEEK[day]] = Day(total_hours, km, activities[day])
+        return week
+
+    def find_weeks(self, monteur=None, date_from=None, date_to=None, iso_year=None, week_number=None):
+        """
+        Looks up archived weeks. All given criteria must match.
+
+        Args:
+            monteur (str, optional): The technician.
+            date_from (date, optional): Only weeks that end on or after this date.
+            date_to (date, optional): Only weeks that start on or before this date.
+            iso_year (int, optional): The ISO year of the week.
+            week_number (int, optional): The ISO week number.
+
+        Returns:
+            list: Tuples of id, technician, week number and date range, ordered by start date.
+        """
+        conditions, parameters = [], []
+        for condition, value in (("monteur = ?", monteur),
+                                 ("end_date >= ?", date_from.isoformat() if date_from else None),
+                                 ("start_date <= ?", date_to.isoformat() if date_to else None),
+                                 ("iso_year = ?", iso_year),
+                                 ("week_number = ?", week_number)):
+            if value is not None:
+                conditions.append(condition)
+                parameters.append(value)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return self.connection.execute(
+            f"SELECT id, monteur, week_number, date_range FROM weeks {where} ORDER BY start_date, monteur", parameters
+        ).fetchall()
+
+    def import_files(self, files, monteur=""):
+        """
+        Imports week JSON files in one transaction. Files that cannot be read are reported and skipped.
+
+        Files written before the metadata was saved have no start date and no
+        technician. Their start date is taken from the date or ISO week in the
+        file name, and their technician from the monteur argument.
+
+        Args:
+            files (list): The week JSON files.
+            monteur (str): The technician of files that do not name one.
+
+        Returns:
+            int: The number of imported weeks.
+        """
+        imported = 0
+        with self.connection:
+            for file_path in files:
+                try:
+                    week = read_week(file_path)
+                    if not parse_date(week.start_date):
+                        start_date = start_date_of(week, file_path)
+                        end_date = start_date + datetime.timedelta(days=6)
+                        week.start_date = start_date.strftime('%d.%m.%Y')
+                        week.date_range = f"{week.start_date} - {end_date.strftime('%d.%m.%Y')}"
+                        week.week_number = start_date.isocalendar()[1]
+                    week.monteur = week.monteur or monteur
+                    self.save_week(week, commit=False)
+                    imported += 1
+                except (IOError, ValueError) as e:
+                    print(f"{file_path}: übersprungen ({e})")
+        return imported
+
+    def export_file(self, week_id, file_path):
+        """
+        Writes an archived week to a JSON file in the format of save_to_json.
+
+        Args:
+            week_id (int): The id of the week.
+            file_path (str): The JSON file to write.
+        """
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump(self.load_week(week_id).to_dict(include_meta=True), f, indent=4, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Wochenarchiv verwalten")
+    parser.add_argument("database", help="Die Archiv-Datei (SQLite)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser("import", help="Wochen-JSON-Dateien importieren")
+    import_parser.add_argument("weeks", nargs="+", help="Verzeichnisse, Dateien oder Glob-Muster")
+    import_parser.add_argument("--monteur", default="", help="Monteur der Dateien ohne Monteur")
+
+    list_parser = subparsers.add_parser("list", help="Archivierte Wochen auflisten")
+    list_parser.add_argument("--monteur")
+    list_parser.add_argument("--von", type=parse_date, help="TT.MM.JJJJ")
+    list_parser.add_argument("--bis", type=parse_date, help="TT.MM.JJJJ")
+    list_parser.add_argument("--jahr", type=int)
+    list_parser.add_argument("--woche", type=int)
+
+    export_parser = subparsers.add_parser("export", help="Eine Woche als JSON-Datei exportieren")
+    export_parser.add_argument("id", type=int)
+    export_parser.add_argument("file")
+
+    who_parser = subparsers.add_parser("wer", help="Wer war zu einem Zeitpunkt mit welcher Aktivität eingetragen?")
+    who_parser.add_argument("date", type=parse_date, help="TT.MM.JJJJ")
+    who_parser.add_argument("time", help="HH:MM")
+    who_parser.add_argument("--typ")
+
+    conflicts_parser = subparsers.add_parser("konflikte", help="Tage mit gleichzeitigen Aktivitäten verschiedener Typen")
+    conflicts_parser.add_argument("--monteur")
+
+    args = parser.parse_args()
+    with WeekArchive(args.database) as archive:
+        if args.command == "import":
+            start_time = time.perf_counter()
+            imported = archive.import_files(find_week_files(args.weeks), args.monteur)
+            print(f"{imported} Wochen in {time.perf_counter() - start_time:.2f} s importiert")
+        elif args.command == "list":
+            for week_id, monteur, week_number, date_range in archive.find_weeks(args.monteur, args.von, args.bis,
+                                                                                args.jahr, args.woche):
+                print(f"{week_id:6d}  KW {week_number or '?':>2}  {date_range:23s}  {monteur}")
+        elif args.command == "export":
+            try:
+                archive.export_file(args.id, args.file)
+            except KeyError:
+                parser.error(f"keine Woche mit der ID {args.id}")
+            print(f"Woche {args.id} nach {args.file} exportiert")
+        elif args.command == "wer":
+            if args.date is None:
+                parser.error("ungültiges Datum")
+            hours, minutes = args.time.split(":")
+            for monteur, activity_type in archive.who_at(args.date, int(hours) + int(minutes) / 60, args.typ):
+                print(f"{monteur}: {activity_type}")
+        elif args.command == "konflikte":
+            for monteur, date_range, day_en, type_a, type_b, mask in archive.find_conflicts(args.monteur):
+                print(f"{monteur}  {date_range}  {day_en}: {type_a} und {type_b} gleichzeitig, {hours_of(mask):.2f} Std.")
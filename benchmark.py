@@ -0,0 +1,403 @@
+"""
+Benchmarks for the DailyDutyLogger.
+
+Usage:
+    python benchmark.py startup
+    python benchmark.py load [--activities 500] [--baseline COMMIT]
+    python benchmark.py plot
+    python benchmark.py rerender [--count 200]
+    python benchmark.py columns [--activities 1000000]
+    python benchmark.py recalc [--rows 200]
+    python benchmark.py pack [--weeks 2000]
+    python benchmark.py undo [--activities 5000] [--edits 1000]
+
+The GUI benchmarks need a display (e.g. a desktop session or Xvfb).
+"""
+import argparse
+import time
+
+from weeklylog import Week, Activity, DAYS_OF_WEEK, ACTIVITY_TYPES
+
+
+def make_synthetic_week(num_activities, num_days=7, notes=True):
+    """
+    Creates a week with the given number of quarter-hour activities,
+    spread evenly over the first days of the week.
+
+    Args:
+        num_activities (int): The total number of activities in the week.
+        num_days (int): The number of days that get activities.
+        notes (bool): Whether the activities get a note.
+
+    Returns:
+        Week: The synthetic week.
+    """
+    week = Week("01.01.2024 - 07.01.2024", "Benchmark", 1, "01.01.2024")
+    for i in range(num_activities):
+        day = week.days[DAYS_OF_WEEK[i % num_days]]
+        start = (len(day.activities) * 0.25) % 24
+        note = f"Notiz {i}" if notes else ""
+        day.add_activity(Activity(ACTIVITY_TYPES[i % len(ACTIVITY_TYPES)], start, start + 0.25, note))
+    return week
+
+
+def benchmark_startup():
+    """
+    Measures the time from importing the application until the main loop
+    is idle for the first time, i.e. until the window can be used.
+    """
+    start_time = time.perf_counter()
+    from main import ActivityLogApp
+    imported = time.perf_counter()
+    app = ActivityLogApp(autosave=False)
+    created = time.perf_counter()
+
+    times = {}
+
+    def on_idle():
+        times['idle'] = time.perf_counter()
+        app.destroy()
+
+    app.after_idle(on_idle)
+    app.mainloop()
+
+    print("Startzeit:")
+    print(f"  Import:             {imported - start_time:.3f} s")
+    print(f"  Fenster erstellen:  {created - imported:.3f} s")
+    print(f"  Bis zum Leerlauf:   {times['idle'] - start_time:.3f} s")
+
+
+def load_baseline_app(revision=None):
+    """
+    Loads the application class from main.py of an earlier commit, without
+    checking it out. The old main.py only needs customtkinter and matplotlib.
+
+    Args:
+        revision (str, optional): The commit; by default the first commit of the repository.
+
+    Returns:
+        type: The ActivityLogApp class of that commit.
+    """
+    import os
+    import subprocess
+    import types
+
+    repository = os.path.dirname(os.path.abspath(__file__))
+    if revision is None:
+        revision = subprocess.check_output(["git", "rev-list", "--max-parents=0", "HEAD"], cwd=repository,
+                                           encoding='utf-8').split()[0]
+    source = subprocess.check_output(["git", "show", f"{revision}:main.py"], cwd=repository, encoding='utf-8')
+    module = types.ModuleType("baseline_main")
+    exec(compile(source, f"{revision}:main.py", "exec"), module.__dict__)
+    return module.ActivityLogApp
+
+
+def benchmark_load(num_activities, revision=None):
+    """
+    Measures how long it takes to show a synthetic week in the GUI, once in
+    the application as it was before the week model (main.py of the given
+    commit: one widget row built per activity, each followed by a
+    recalculation of the day) and once through the batch load_week path of
+    the current application.
+    """
+    from main import ActivityLogApp
+
+    BaselineApp = load_baseline_app(revision)
+    data = make_synthetic_week(num_activities).to_dict()
+
+    # Baseline: the body of its load_from_json, without the file dialog
+    app = BaselineApp()
+    app.update()
+    start_time = time.perf_counter()
+    app.clear_all_data()
+    for day_en in DAYS_OF_WEEK:
+        app.day_widgets[day_en]['total_hours_entry'].insert(0, str(data[day_en]['total_hours']))
+        app.day_widgets[day_en]['km_entry'].insert(0, str(data[day_en]['km']))
+        for activity in data[day_en]['activities']:
+            app.add_activity_row(day_en, activity)
+    app.calculate_all_working_hours()
+    app.update_idletasks()
+    baseline = time.perf_counter() - start_time
+    app.destroy()
+
+    # Batch path
+    app = ActivityLogApp(autosave=False, prewarm_renderer=False)
+    app.update()
+    start_time = time.perf_counter()
+    app.load_week(make_synthetic_week(num_activities))
+    app.update_idletasks()
+    batch = time.perf_counter() - start_time
+    app.destroy()
+
+    print(f"Laden von {num_activities} Aktivitäten:")
+    print(f"  Vorher (Zeile für Zeile): {baseline:.3f} s")
+    print(f"  Jetzt (stapelweise):      {batch:.3f} s")
+
+
+def benchmark_recalculation(num_rows):
+    """
+    Measures the handler time of tabbing through activity rows (FocusOut on
+    the start and end time, then a type change), once with an immediate
+    recalculation per event and once with the coalescing scheduler.
+    """
+    from main import ActivityLogApp
+
+    app = ActivityLogApp(autosave=False)
+    app.load_week(make_synthetic_week(num_rows, num_days=1))
+    app.update()
+    rows = [row for row in app.activity_widgets[DAYS_OF_WEEK[0]].rows if row['activity'] is not None]
+
+    results = {}
+    for name, recalculate in (("Sofort", app.calculate_day_working_hours),
+                              ("Gebündelt", app.schedule_recalculation)):
+        start_time = time.perf_counter()
+        for i in range(num_rows):
+            row = rows[i % len(rows)]
+            for _ in range(3):
+                app.update_activity_from_row(DAYS_OF_WEEK[0], row)
+                recalculate(DAYS_OF_WEEK[0])
+            app.update_idletasks()
+        results[name] = (time.perf_counter() - start_time) / (num_rows * 3)
+
+    app.destroy()
+    stats = app.recalculation_stats
+    print(f"Handlerzeit pro Ereignis bei {num_rows} Zeilen:")
+    for name, seconds in results.items():
+        print(f"  {name + ':':11s} {seconds * 1e6:.0f} µs")
+    print(f"  {stats['requests']} Anforderungen, {stats['runs']} Neuberechnungen, {stats['seconds'] * 1000:.1f} ms")
+
+
+def benchmark_plot(sizes=(10, 100, 1000)):
+    """
+    Measures the number of artists and the render time of the diagram of a
+    single day with a growing number of activities (without notes).
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from logbook import logbook
+
+    print("Aktivitäten  Artists  Zeichnen  Rendern")
+    for size in sizes:
+        diagram = logbook(make_synthetic_week(size, num_days=1, notes=False))
+        start_time = time.perf_counter()
+        fig = diagram.create_figure()
+        drawn = time.perf_counter()
+        FigureCanvasAgg(fig).draw()
+        rendered = time.perf_counter()
+        artists = sum(len(ax.lines) + len(ax.collections) + len(ax.texts) for ax in fig.axes)
+        print(f"{size:11d}  {artists:7d}  {drawn - start_time:7.3f}s  {rendered - drawn:6.3f}s")
+
+
+def benchmark_rerender(count):
+    """
+    Compares building a new figure per render with redrawing a cached
+    diagram template, including the peak memory of the process.
+    """
+    import resource
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from logbook import logbook, release_templates
+
+    weeks = [make_synthetic_week(60 + i % 5, notes=True) for i in range(count)]
+
+    for name, render in (("Neue Figur", lambda diagram: diagram.create_figure()),
+                         ("Vorlage", lambda diagram: diagram.render())):
+        start_time = time.perf_counter()
+        for week in weeks:
+            fig = render(logbook(week))
+            FigureCanvasAgg(fig).draw()
+        elapsed = time.perf_counter() - start_time
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f"{name}: {count} Diagramme in {elapsed:.2f} s ({elapsed / count * 1000:.1f} ms/Diagramm), "
+              f"Spitzenspeicher {peak:.0f} MB")
+    release_templates()
+
+
+def benchmark_columns(num_activities):
+    """
+    Compares the weekly totals of Week models with the vectorized totals of
+    an ActivityTable holding the same activities, including the memory used.
+    """
+    import tracemalloc
+    from activitytable import ActivityTable
+
+    num_weeks = max(1, num_activities // 70)
+    tracemalloc.start()
+    weeks = []
+    for i in range(num_weeks):
+        week = make_synthetic_week(70, notes=False)
+        week.monteur = f"Monteur {i % 50}"
+        weeks.append(week)
+    models_memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    start_time = time.perf_counter()
+    model_total = sum(week.working_hours() for week in weeks)
+    model_types = {}
+    for week in weeks:
+        for day in week.days.values():
+            for activity in day.activities.values():
+                model_types[activity.type] = model_types.get(activity.type, 0.0) + activity.end - activity.start
+    models = time.perf_counter() - start_time
+
+    table = ActivityTable.from_weeks(weeks)
+    start_time = time.perf_counter()
+    table_total = table.working_hours()
+    table.hours_by_type()
+    table.working_hours_by_monteur()
+    table.working_hours_by('week')
+    vectorized = time.perf_counter() - start_time
+
+    print(f"{len(table)} Aktivitäten in {num_weeks} Wochen:")
+    print(f"  Modelle:  {models:.3f} s, {models_memory / 1e6:.0f} MB, Summe {model_total:.2f}")
+    print(f"  Tabelle:  {vectorized:.3f} s, {table.nbytes() / 1e6:.0f} MB, Summe {table_total:.2f}")
+
+
+def benchmark_pack(num_weeks):
+    """
+    Compares loading single weeks from JSON files (as "Daten aus JSON laden"
+    does) with loading them from a memory-mapped week container, and checks
+    that both give the same data.
+    """
+    import json
+    import os
+    import random
+    import tempfile
+    from weeklylog import read_week
+    from weekpack import WeekPack, write_pack
+
+    weeks = []
+    for i in range(num_weeks):
+        week = make_synthetic_week(20 + i % 60)
+        week.monteur = f"Monteur {i % 50}"
+        weeks.append(week)
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for i, week in enumerate(weeks):
+            paths.append(os.path.join(directory, f"woche_{i}.json"))
+            with open(paths[-1], 'w', encoding='utf-8') as f:
+                json.dump(week.to_dict(include_meta=True), f, indent=4, ensure_ascii=False)
+        pack_path = os.path.join(directory, "wochen.ddlw")
+        start_time = time.perf_counter()
+        write_pack(pack_path, weeks)
+        packing = time.perf_counter() - start_time
+        json_bytes = sum(os.path.getsize(path) for path in paths)
+        pack_bytes = os.path.getsize(pack_path)
+
+        order = random.sample(range(num_weeks), num_weeks)
+        start_time = time.perf_counter()
+        from_json = [read_week(paths[i]) for i in order]
+        json_time = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        with WeekPack(pack_path) as pack:
+            opening = time.perf_counter() - start_time
+            from_pack = [pack.read_week(i) for i in order]
+        pack_time = time.perf_counter() - start_time
+
+    mismatches = sum(a.to_dict(include_meta=True) != b.to_dict(include_meta=True) for a, b in zip(from_json, from_pack))
+    print(f"{num_weeks} Wochen, {sum(len(day.activities) for week in weeks for day in week.days.values())} Aktivitäten:")
+    print(f"  JSON:  {json_bytes / 1e6:.1f} MB, {json_time / num_weeks * 1000:.3f} ms/Woche")
+    print(f"  Paket: {pack_bytes / 1e6:.1f} MB, {pack_time / num_weeks * 1000:.3f} ms/Woche "
+          f"(Öffnen {opening * 1000:.1f} ms, Packen {packing:.2f} s)")
+    print(f"  Abweichungen: {mismatches}")
+
+
+def benchmark_undo(num_activities, num_edits):
+    """
+    Measures the memory of the undo log after many single edits and a bulk
+    clear, compared with one snapshot of the week, and the time to undo and
+    redo all of them.
+    """
+    import copy
+    import random
+    import tracemalloc
+    from undolog import UndoLog, activity_values
+
+    week = make_synthetic_week(num_activities)
+    before = week.to_dict(include_meta=True)
+    activities = [(day_en, activity) for day_en, day in week.days.items() for activity in day.activities.values()]
+
+    tracemalloc.start()
+    snapshot = copy.deepcopy(week)
+    snapshot_memory = tracemalloc.get_traced_memory()[0]
+    del snapshot
+    tracemalloc.stop()
+
+    log = UndoLog(limit=num_edits + 1)
+    tracemalloc.start()
+    for i in range(num_edits):
+        day_en, activity = random.choice(activities)
+        old_values = activity_values(activity)
+        week.days[day_en].update_activity_minutes(activity, activity.type, activity.start_minute,
+                                                  activity.end_minute + 5, f"Geändert {i}")
+        log.record(('edit', day_en, activity, old_values, activity_values(activity)))
+        log.seal()
+    log.record(('clear', None, (week.monteur, week.start_date, week.date_range, week.week_number), {
+        day_en: (day.total_hours, day.km, tuple(day.activities.values())) for day_en, day in week.days.items()
+    }))
+    week.clear()
+    log_memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    start_time = time.perf_counter()
+    while log.undo(week):
+        pass
+    undo_time = time.perf_counter() - start_time
+    restored = week.to_dict(include_meta=True) == before
+    start_time = time.perf_counter()
+    while log.redo(week):
+        pass
+    redo_time = time.perf_counter() - start_time
+
+    print(f"{num_edits} Änderungen und Löschen aller Daten, Woche mit {num_activities} Aktivitäten:")
+    print(f"  Undo-Log:  {log_memory / 1e3:.0f} kB ({log_memory / (num_edits + 1):.0f} Bytes/Eintrag)")
+    print(f"  Eine Kopie der Woche: {snapshot_memory / 1e3:.0f} kB")
+    print(f"  Alles rückgängig: {undo_time * 1000:.1f} ms, wiederholen: {redo_time * 1000:.1f} ms, "
+          f"Ausgangszustand wiederhergestellt: {'ja' if restored else 'nein'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks für das Aktivitäten-Protokoll")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    subparsers.add_parser("startup", help="Startzeit bis zum ersten Leerlauf")
+
+    load_parser = subparsers.add_parser("load", help="Laden einer Woche in die GUI")
+    load_parser.add_argument("--activities", type=int, default=500)
+    load_parser.add_argument("--baseline", help="Commit der Vergleichsversion (Standard: erster Commit)")
+
+    recalc_parser = subparsers.add_parser("recalc", help="Handlerzeit beim Durchtabben von Zeilen")
+    recalc_parser.add_argument("--rows", type=int, default=200)
+
+    subparsers.add_parser("plot", help="Artists und Renderzeit des Diagramms")
+
+    rerender_parser = subparsers.add_parser("rerender", help="Wiederholtes Rendern mit und ohne Vorlage")
+    rerender_parser.add_argument("--count", type=int, default=200)
+
+    columns_parser = subparsers.add_parser("columns", help="Summen über viele Wochen als Spalten-Tabelle")
+    columns_parser.add_argument("--activities", type=int, default=1000000)
+
+    pack_parser = subparsers.add_parser("pack", help="Laden aus JSON-Dateien und aus einem Wochen-Paket")
+    pack_parser.add_argument("--weeks", type=int, default=2000)
+
+    undo_parser = subparsers.add_parser("undo", help="Speicher und Zeit von Rückgängig/Wiederholen")
+    undo_parser.add_argument("--activities", type=int, default=5000)
+    undo_parser.add_argument("--edits", type=int, default=1000)
+
+    args = parser.parse_args()
+    if args.benchmark == "startup":
+        benchmark_startup()
+    elif args.benchmark == "load":
+        benchmark_load(args.activities, args.baseline)
+    elif args.benchmark == "recalc":
+        benchmark_recalculation(args.rows)
+    elif args.benchmark == "plot":
+        benchmark_plot()
+    elif args.benchmark == "rerender":
+        benchmark_rerender(args.count)
+    elif args.benchmark == "columns":
+        benchmark_columns(args.activities)
+    elif args.benchmark == "pack":
+        benchmark_pack(args.weeks)
+    elif args.benchmark == "undo":
+        benchmark_undo(args.activities, args.edits)
@@ -0,0 +1,189 @@
+"""
+Checks week logs for break rule violations and inconsistent times.
+
+Usage:
+    python compliance.py WOCHEN [WOCHEN ...]
+    python compliance.py --archiv ARCHIV.db [--monteur NAME] [--von TT.MM.JJJJ] [--bis TT.MM.JJJJ]
+
+WOCHEN is a directory with week JSON files (as written by "In JSON-Datei
+speichern") or a glob pattern.
+
+Per day, the activities are sorted once and swept from morning to night:
+    - more than 6 working hours in total need at least 30 minutes of break,
+    - no more than 6 hours of work in a row without a break,
+    - activities must not overlap and must not end before they start.
+Only breaks of at least 15 minutes count, without the part that overlaps
+work. Gaps between activities are not working time; they are reported and
+count as breaks.
+"""
+import argparse
+import time
+
+from weeklylog import BREAK_TYPE, DAYS_OF_WEEK, format_minutes, read_week, find_week_files
+
+MAX_MINUTES_WITHOUT_BREAK = 6 * 60
+MIN_BREAK_MINUTES = 30
+MIN_BREAK_BLOCK_MINUTES = 15
+
+# Kinds of findings; gaps are only notices, the others are violations
+BREAK_TOO_SHORT = 'pause'
+WORK_TOO_LONG = 'ohne_pause'
+OVERLAP = 'ueberschneidung'
+NEGATIVE = 'negativ'
+GAP = 'luecke'
+
+
+class Finding:
+    """
+    A problem found in the activities of a day, for the time from start to end (minutes).
+    """
+
+    __slots__ = ('kind', 'start', 'end', 'message')
+
+    def __init__(self, kind, start, end, message):
+        self.kind = kind
+        self.start = start
+        self.end = end
+        self.message = message
+
+    def is_violation(self):
+        """Returns True for rule violations and inconsistent times, False for notices."""
+        return self.kind != GAP
+
+    def __str__(self):
+        return f"{format_minutes(self.start)}-{format_minutes(self.end)}: {self.message}"
+
+
+def check_day(day):
+    """
+    Checks the activities of one day in a single sweep over the activities sorted by start time.
+    All times are integer minutes, so the limits are checked exactly.
+
+    Args:
+        day (Day): The day to check.
+
+    Returns:
+        list: The findings, in the order of their start time.
+    """
+    findings = []
+    activities = []
+    for activity in day.activities.values():
+        if not activity.is_valid():
+            continue
+        if activity.end_minute < activity.start_minute:
+            findings.append(Finding(NEGATIVE, activity.end_minute, activity.start_minute, "Endzeit liegt vor der Startzeit"))
+        else:
+            activities.append(activity)
+    activities.sort(key=lambda a: (a.start_minute, a.end_minute))
+
+    covered_until = None  # The latest end time of the activities swept so far
+    stretch = 0  # Working minutes since the last break
+    stretch_reported = False
+    work = 0
+    breaks = 0
+    for activity in activities:
+        start, end = activity.start_minute, activity.end_minute
+        if covered_until is not None:
+            if start < covered_until:
+                findings.append(Finding(OVERLAP, start, min(end, covered_until), "Aktivitäten überschneiden sich"))
+                start = covered_until  # Only count the part that is not covered yet
+            elif start > covered_until:
+                gap = start - covered_until
+                findings.append(Finding(GAP, covered_until, start, "Keine Aktivität eingetragen"))
+                if gap >= MIN_BREAK_BLOCK_MINUTES:
+                    breaks += gap
+                    stretch, stretch_reported = 0, False
+
+        duration = max(end - start, 0)
+        if activity.type == BREAK_TYPE:
+            if duration >= MIN_BREAK_BLOCK_MINUTES:  # Only the part not covered by work yet
+                breaks += duration
+                stretch, stretch_reported = 0, False
+        else:
+            work += duration
+            stretch += duration
+            if stretch > MAX_MINUTES_WITHOUT_BREAK and not stretch_reported:
+                exceeded_at = end - (stretch - MAX_MINUTES_WITHOUT_BREAK)
+                findings.append(Finding(WORK_TOO_LONG, exceeded_at, end, "Mehr als 6 Stunden ohne Pause gearbeitet"))
+                stretch_reported = True
+        covered_until = end if covered_until is None else max(covered_until, end)
+
+    if work > MAX_MINUTES_WITHOUT_BREAK and breaks < MIN_BREAK_MINUTES:
+        findings.append(Finding(BREAK_TOO_SHORT, activities[0].start_minute, covered_until,
+                                f"{work / 60:.2f} Arbeitsstunden, aber nur {breaks} min Pause (mindestens 30 min)"))
+    findings.sort(key=lambda finding: finding.start)
+    return findings
+
+
+def check_week(week):
+    """
+    Checks all days of a week.
+
+    Args:
+        week (Week): The week to check.
+
+    Returns:
+        dict: The findings per English day name, only for days with findings.
+    """
+    findings = {}
+    for day_en in DAYS_OF_WEEK:
+        day_findings = check_day(week.days[day_en])
+        if day_findings:
+            findings[day_en] = day_findings
+    return findings
+
+
+def report(name, week, notices=False):
+    """
+    Prints the findings of a week.
+
+    Args:
+        name (str): How the week is named in the output.
+        week (Week): The week to check.
+        notices (bool): Also print notices such as gaps.
+
+    Returns:
+        int: The number of violations.
+    """
+    violations = 0
+    for day_en, findings in check_week(week).items():
+        for finding in findings:
+            if finding.is_violation():
+                violations += 1
+            elif not notices:
+                continue
+            print(f"{name} {day_en} {finding}")
+    return violations
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Wochen auf Pausenregel und Zeitfehler prüfen")
+    parser.add_argument("weeks", nargs="*", help="Verzeichnisse, Dateien oder Glob-Muster mit Wochen-JSON-Dateien")
+    parser.add_argument("--archiv", help="Die Wochen aus dieser Archiv-Datei prüfen")
+    parser.add_argument("--monteur")
+    parser.add_argument("--von", help="TT.MM.JJJJ")
+    parser.add_argument("--bis", help="TT.MM.JJJJ")
+    parser.add_argument("--luecken", action="store_true", help="Auch Lücken zwischen Aktivitäten ausgeben")
+    args = parser.parse_args()
+    if not args.weeks and not args.archiv:
+        parser.error("bitte Wochen-Dateien oder --archiv angeben")
+
+    start_time = time.perf_counter()
+    checked = violations = 0
+    for file_path in find_week_files(args.weeks):
+        try:
+            week = read_week(file_path)
+        except (IOError, ValueError) as e:
+            print(f"{file_path}: übersprungen ({e})")
+            continue
+        violations += report(file_path, week, args.luecken)
+        checked += 1
+    if args.archiv:
+        from archive import WeekArchive, parse_date
+        with WeekArchive(args.archiv) as archive:
+            for week_id, monteur, week_number, date_range in archive.find_weeks(
+                    args.monteur, parse_date(args.von), parse_date(args.bis)):
+                violations += report(f"{monteur} KW {week_number}", archive.load_week(week_id), args.luecken)
+                checked += 1
+    print(f"{checked} Wochen in {time.perf_counter() - start_time:.2f} s geprüft, {violations} Verstöße gefunden")
+    raise SystemExit(1 if violations else 0)
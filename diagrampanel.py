@@ -0,0 +1,113 @@
+import customtkinter as ctk
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.figure import Figure
+
+from logbook import logbook, ACTIVITY_MAPPING, QUARTER_HOURS
+from weeklylog import DAYS_OF_WEEK, DAYS_OF_WEEK_DE
+
+
+class DiagramPanel(ctk.CTkFrame):
+    """
+    A live diagram of the week embedded in the application window.
+
+    The panel shows one fixed subplot per weekday. The static parts (ticks,
+    grids, labels) are drawn once and cached as a background bitmap per
+    subplot. When a day changes, only its activities are redrawn on top of its
+    cached background and blitted to the screen, and updates are debounced so
+    typing stays responsive.
+    """
+
+    def __init__(self, master, get_week, delay=300, **kwargs):
+        """
+        Args:
+            master: The parent widget.
+            get_week (callable): Returns the Week that is currently shown.
+            delay (int): Milliseconds to wait for further changes before redrawing.
+        """
+        super().__init__(master, **kwargs)
+        self.get_week = get_week
+        self.delay = delay
+        self.dirty_days = set()
+        self.after_id = None
+        self.backgrounds = {}
+        self.day_artists = {day_en: [] for day_en in DAYS_OF_WEEK}
+
+        self.fig = Figure(figsize=(10, 3.5))
+        self.axes = dict(zip(DAYS_OF_WEEK, self.fig.subplots(len(DAYS_OF_WEEK), 1, sharex=True)))
+        for (day_en, ax), day_de in zip(self.axes.items(), DAYS_OF_WEEK_DE):
+            ax.set_yticks(list(ACTIVITY_MAPPING.values()))
+            ax.set_yticklabels(list(ACTIVITY_MAPPING.keys()), fontsize=6)
+            ax.set_ylim(-0.5, len(ACTIVITY_MAPPING) - 0.5)
+            ax.set_xticks(range(0, 25, 1))
+            ax.set_xticks(QUARTER_HOURS, minor=True)
+            ax.set_xlim(0, 24)
+            ax.tick_params(axis='x', labelsize=6)
+            ax.grid(axis='x', which='major', linestyle='-', alpha=0.7)
+            ax.grid(axis='x', which='minor', linestyle=':', alpha=0.3)
+            ax.set_ylabel(day_de[:2], rotation=0, ha='right', va='center', fontsize=8, weight='bold')
+            for spine in ax.spines.values():
+                spine.set_visible(False)
+        self.fig.subplots_adjust(left=0.05, right=0.99, top=0.98, bottom=0.08, hspace=0.3)
+
+        self.canvas = FigureCanvasTkAgg(self.fig, master=self)
+        self.canvas.get_tk_widget().pack(fill="both", expand=True)
+        # A full draw (e.g. after resizing) renews the cached backgrounds
+        self.canvas.mpl_connect('draw_event', self.on_draw)
+        self.canvas.draw_idle()
+
+    def schedule_update(self, day_en=None):
+        """
+        Marks a day (or, without argument, all days) as changed and redraws
+        the changed days after the delay, unless further changes arrive first.
+        """
+        if day_en is None:
+            self.dirty_days.update(DAYS_OF_WEEK)
+        else:
+            self.dirty_days.add(day_en)
+        if self.after_id is not None:
+            self.after_cancel(self.after_id)
+        self.after_id = self.after(self.delay, self.flush)
+
+    def flush(self):
+        """Redraws all changed days right away."""
+        self.after_id = None
+        dirty_days, self.dirty_days = self.dirty_days, set()
+        if not self.backgrounds:
+            return  # The first full draw shows all days anyway
+        for day_en in dirty_days:
+            self.update_day(day_en)
+            self.blit_day(day_en)
+
+    def update_day(self, day_en):
+        """Replaces the activity artists of a day with the current data of the week."""
+        for artist in self.day_artists[day_en]:
+            artist.remove()
+        ax = self.axes[day_en]
+        diagram = logbook(self.get_week())
+        artists = diagram.draw_activities(ax, diagram.sorted_activities(day_en))
+        hours = self.get_week().days[day_en].working_hours()
+        artists.append(ax.text(23.9, 2.2, f"Std. {hours:.2f}", ha='right', va='center', fontsize=7))
+        for artist in artists:
+            # Animated artists are left out of full draws and only drawn when blitting
+            artist.set_animated(True)
+        self.day_artists[day_en] = artists
+
+    def blit_day(self, day_en):
+        """Draws the activities of a day on top of its cached background."""
+        ax = self.axes[day_en]
+        self.canvas.restore_region(self.backgrounds[day_en])
+        for artist in self.day_artists[day_en]:
+            ax.draw_artist(artist)
+        self.canvas.blit(ax.bbox)
+
+    def on_draw(self, event):
+        """Caches the backgrounds of all subplots after a full draw and redraws their data."""
+        for day_en, ax in self.axes.items():
+            self.backgrounds[day_en] = self.canvas.copy_from_bbox(ax.bbox)
+        # The canvas shows the rendered figure right after this event, so drawing
+        # the activities into the renderer is enough here
+        for day_en, ax in self.axes.items():
+            self.update_day(day_en)
+            for artist in self.day_artists[day_en]:
+                ax.draw_artist(artist)
+        self.dirty_days.clear()
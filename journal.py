@@ -0,0 +1,202 @@
+import json
+import os
+import queue
+import threading
+
+from weeklylog import Week, Day, Activity
+
+
+class Journal:
+    """
+    Autosaves the edits of a week as an append-only journal.
+
+    Every change is appended as one small JSON line to `journal.jsonl`, so an
+    edit costs as much as the change itself, not as the whole week. After a
+    number of changes the journal is compacted: the whole week is written to
+    `snapshot.json` and the journal starts over. The files are written by a
+    background thread, so the GUI never waits for the disk.
+
+    The records are dicts with an 'op' and the day of the change:
+        add     - an activity was added ('id', 'activity', optionally its 'position')
+        remove  - an activity was removed ('id')
+        edit    - the fields of an activity were edited ('id', 'activity')
+        day     - the total hours or km of a day were edited ('total_hours', 'km')
+        meta    - the technician or the dates were edited ('meta')
+        clear   - all data was deleted
+
+    The ids are those of the Activity objects of the session that wrote the
+    records. A restored session gets new ids, so it starts with a new snapshot.
+    """
+
+    def __init__(self, directory, get_week, compact_every=500):
+        """
+        Args:
+            directory (str): Where the snapshot and the journal are stored.
+            get_week (callable): Returns the week to write into a snapshot.
+            compact_every (int): The number of records after which the journal is compacted.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.snapshot_path = os.path.join(directory, "snapshot.json")
+        self.journal_path = os.path.join(directory, "journal.jsonl")
+        self.get_week = get_week
+        self.compact_every = compact_every
+        self.records = 0
+        self.queue = queue.Queue()
+        self.writer = threading.Thread(target=self.write_loop, daemon=True)
+        self.writer.start()
+
+    def append(self, record):
+        """
+        Queues a change record for writing and compacts the journal when it has grown too long.
+
+        Args:
+            record (dict): The change record, see the class docstring.
+        """
+        self.queue.put(('append', record))
+        self.records += 1
+        if self.records >= self.compact_every:
+            self.compact()
+
+    def compact(self):
+        """Queues a snapshot of the current week, after which the journal is emptied."""
+        self.queue.put(('snapshot', snapshot_of(self.get_week())))
+        self.records = 0
+
+    def close(self):
+        """Writes all queued records and stops the writer thread."""
+        self.queue.put(None)
+        self.writer.join()
+
+    def write_loop(self):
+        """Writes the queued records and snapshots in order. Runs in the writer thread."""
+        journal = open(self.journal_path, 'a', encoding='utf-8')
+        try:
+            while True:
+                item = self.queue.get()
+                # Write everything that is already queued before flushing once
+                while item is not None:
+                    action, data = item
+                    if action == 'append':
+                        journal.write(json.dumps(data, ensure_ascii=False) + "\n")
+                    else:
+                        temp_path = self.snapshot_path + ".tmp"
+                        with open(temp_path, 'w', encoding='utf-8') as f:
+                            json.dump(data, f, ensure_ascii=False)
+                        os.replace(temp_path, self.snapshot_path)
+                        journal.close()
+                        journal = open(self.journal_path, 'w', encoding='utf-8')
+                    try:
+                        item = self.queue.get_nowait()
+                    except queue.Empty:
+                        break
+                journal.flush()
+                if item is None:
+                    return
+        finally:
+            journal.close()
+
+    def restore(self):
+        """
+        Replays the snapshot and the journal of an earlier session.
+
+        Records that cannot be read (e.g. a line cut off by a crash) end the replay.
+
+        Returns:
+            Week: The restored week, or None if there is nothing to restore.
+        """
+        week, activities = None, {}
+        if os.path.exists(self.snapshot_path):
+            try:
+                with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                    week, activities = week_from_snapshot(json.load(f))
+            except (IOError, ValueError) as e:
+                print(f"Fehler beim Lesen der Sicherung: {e}")
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    if week is None:
+                        week = Week()
+                    apply_record(week, activities, record)
+        return week
+
+
+def snapshot_of(week):
+    """
+    Returns the complete state of a week, including activities with invalid
+    times and the ids of the activities, as a JSON-compatible dict.
+    """
+    return {
+        'meta': meta_of(week),
+        'days': {
+            day_en: {
+                'total_hours': day.total_hours,
+                'km': day.km,
+                'activities': [dict(activity.to_dict(), id=activity.id) for activity in day.activities.values()]
+            } for day_en, day in week.days.items()
+        }
+    }
+
+
+def meta_of(week):
+    """Returns the metadata of a week in the format of the 'meta' object."""
+    return {
+        'monteur': week.monteur,
+        'start_date': week.start_date,
+        'date_range': week.date_range,
+        'week_number': week.week_number
+    }
+
+
+def week_from_snapshot(data):
+    """
+    Creates a week from a snapshot.
+
+    Returns:
+        tuple: The week and a dict from the ids in the snapshot to the new activities.
+    """
+    week = Week.from_dict({'meta': data['meta']})
+    activities = {}
+    for day_en, day_data in data['days'].items():
+        day_activities = []
+        for activity_data in day_data['activities']:
+            activity = Activity(activity_data['type'], activity_data['start'], activity_data['end'], activity_data['note'])
+            activities[activity_data['id']] = activity
+            day_activities.append(activity)
+        week.days[day_en] = Day(day_data['total_hours'], day_data['km'], day_activities)
+    return week, activities
+
+
+def apply_record(week, activities, record):
+    """
+    Applies a change record to a week.
+
+    Args:
+        week (Week): The week to change.
+        activities (dict): Maps the ids in the records to the activities of the week; updated in place.
+        record (dict): The change record.
+    """
+    op = record['op']
+    if op == 'clear':
+        week.clear()
+        activities.clear()
+    elif op == 'meta':
+        for key, value in record['meta'].items():
+            setattr(week, key, value)
+    else:
+        day = week.days[record['day']]
+        if op == 'day':
+            day.total_hours = record['total_hours']
+            day.km = record['km']
+        elif op == 'add' and record['id'] not in activities:
+            data = record['activity']
+            activities[record['id']] = Activity(data['type'], data['start'], data['end'], data['note'])
+            day.insert_activity(activities[record['id']], record.get('position', len(day.activities)))
+        elif op == 'remove' and record['id'] in activities:
+            day.remove_activity(activities.pop(record['id']).id)
+        elif op == 'edit' and record['id'] in activities:
+            data = record['activity']
+            day.update_activity(activities[record['id']], data['type'], data['start'], data['end'], data['note'])
@@ -1,22 +1,261 @@
-import matplotlib.pyplot as plt
-import datetime
+import io
+
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
 import numpy as np
 
-from weeklylog import weeklylog # Import numpy for arange
+from weeklylog import DAYS_OF_WEEK, DAYS_OF_WEEK_DE, TYPE_CODES
+
+ACTIVITY_MAPPING = TYPE_CODES
+COLORS = {'A': '#ff7f0e', 'F': '#1f77b4', 'P': '#d62728'}
+QUARTER_HOURS = np.arange(0, 24.25, 0.25)
+
+# Cached diagram templates, keyed by the number of plotted days
+templates = {}
+
 
 class logbook:
-    def __init__(self):
-        self.days_of_work = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        self.num_days = len(self.days_of_work)
-        self.activity_mapping = {
-            'F': 0, # Driving
-            'P': 1, # Break
-            'A': 2 # Work
-        }
-        self.colors = {
-            'F': 'blue',
-            'P': 'yellow',
-            'A': 'blue'
-        }
-        
-        self.weeklylog = weeklylog("03.05.25 bis 04.05.25", "Manfred", 31)
\ No newline at end of file
+    """
+    Draws the driver's logbook diagram of a week using connected line segments
+    (step plot), one subplot per day with activities.
+
+    The segments of a day are drawn as one LineCollection per activity type plus
+    one for the transitions, so the number of artists does not grow with the
+    number of activities.
+
+    The diagram is drawn from a Week model and needs no GUI, so it can be used
+    both by the application and by headless batch jobs.
+    """
+
+    def __init__(self, weeklylog):
+        """
+        Args:
+            weeklylog (Week): The week to draw.
+        """
+        self.days_of_work = DAYS_OF_WEEK
+        self.day_names = dict(zip(DAYS_OF_WEEK, DAYS_OF_WEEK_DE))
+        self.activity_mapping = ACTIVITY_MAPPING
+        self.colors = COLORS
+        self.weeklylog = weeklylog
+
+    def days_to_plot(self):
+        """Returns the days that have at least one activity with valid times."""
+        return [day_en for day_en in self.days_of_work
+                if any(activity.is_valid() for activity in self.weeklylog.days[day_en].activities.values())]
+
+    def figure_size(self):
+        """Returns the figure size in inches, which depends on the number of plotted days."""
+        return (12, 2.5 * len(self.days_to_plot()))
+
+    def create_figure(self):
+        """
+        Creates a new figure without any GUI backend and draws the diagram into it.
+
+        Returns:
+            Figure: The finished figure, e.g. to be saved with savefig.
+        """
+        fig = Figure(figsize=self.figure_size())
+        self.draw(fig)
+        return fig
+
+    def render(self):
+        """
+        Draws the diagram into a cached template figure for the number of
+        plotted days. Only the data is redrawn; the axes, ticks, grids and
+        layout are reused from earlier renders.
+
+        The returned figure is redrawn by the next render with the same number
+        of days, so it has to be saved before that. Call release_templates()
+        to free the cached figures.
+
+        Returns:
+            Figure: The template figure showing this week.
+        """
+        days_with_activities = self.days_to_plot()
+        template = templates.get(len(days_with_activities))
+        if template is None:
+            template = templates[len(days_with_activities)] = DiagramTemplate(len(days_with_activities))
+        return template.render(self, days_with_activities)
+
+    def render_bytes(self, fmt='png', dpi=None):
+        """
+        Renders the diagram into the bytes of an image or PDF file.
+
+        Args:
+            fmt (str): The file format, e.g. 'png' or 'pdf'.
+            dpi (int, optional): The resolution of raster formats.
+
+        Returns:
+            bytes: The content of the file.
+        """
+        buffer = io.BytesIO()
+        self.render().savefig(buffer, format=fmt, dpi=dpi)
+        return buffer.getvalue()
+
+    def draw(self, fig):
+        """
+        Draws the diagram into an empty figure.
+
+        Args:
+            fig (Figure): The figure to draw into.
+        """
+        days_with_activities = self.days_to_plot()
+        DiagramTemplate(len(days_with_activities), fig).render(self, days_with_activities)
+
+    def sorted_activities(self, day_en):
+        """Returns the valid activities of a day, sorted by start time to ensure correct plotting order."""
+        return sorted((activity for activity in self.weeklylog.days[day_en].activities.values() if activity.is_valid()),
+                      key=lambda x: x.start)
+
+    def draw_activities(self, ax, sorted_activities):
+        """
+        Draws the activities of one day, sorted by start time, into an axes.
+
+        Args:
+            ax (Axes): The subplot of the day.
+            sorted_activities (list): The valid activities of the day, sorted by start time.
+
+        Returns:
+            list: The artists that were added.
+        """
+        if not sorted_activities:
+            return []
+        artists = []
+        starts = np.array([activity.start for activity in sorted_activities], dtype=float)
+        ends = np.array([activity.end for activity in sorted_activities], dtype=float)
+        types = np.array([activity.type for activity in sorted_activities])
+        y_pos = np.array([self.activity_mapping.get(activity.type, 0) for activity in sorted_activities], dtype=float)
+
+        # One collection of horizontal segments per activity type
+        for activity_type in np.unique(types):
+            mask = types == activity_type
+            segments = np.stack([np.column_stack([starts[mask], y_pos[mask]]),
+                                 np.column_stack([ends[mask], y_pos[mask]])], axis=1)
+            artists.append(ax.add_collection(LineCollection(segments, colors=self.colors.get(activity_type, 'gray'),
+                                                            linewidths=4, capstyle='butt', zorder=2), autolim=False))
+
+        # Connect activities with a vertical black line where the next one starts exactly
+        # where the current one ends
+        connected = ends[:-1] == starts[1:]
+        if connected.any():
+            segments = np.stack([np.column_stack([ends[:-1][connected], y_pos[:-1][connected]]),
+                                 np.column_stack([starts[1:][connected], y_pos[1:][connected]])], axis=1)
+            artists.append(ax.add_collection(LineCollection(segments, colors='black', linewidths=1.5, linestyle='-', zorder=2),
+                                             autolim=False))
+
+        # Add notes
+        for activity in sorted_activities:
+            if activity.note:
+                artists.append(ax.text(activity.start + (activity.end - activity.start) / 2,
+                                       self.activity_mapping.get(activity.type, 0) + 0.3, activity.note,
+                                       ha='center', va='bottom', fontsize=8, color='black'))
+        return artists
+
+
+class DiagramTemplate:
+    """
+    A figure with the static parts of the diagram for a fixed number of days:
+    the subplots, the hour and quarter-hour ticks, the grids, the spines and
+    the layout. Rendering a week only replaces the data artists and the texts,
+    which makes re-rendering much cheaper than building a new figure.
+    """
+
+    def __init__(self, num_days, fig=None):
+        """
+        Args:
+            num_days (int): The number of plotted days (subplots).
+            fig (Figure, optional): An empty figure to use, e.g. from pyplot.
+                By default a new figure without a GUI backend is created.
+        """
+        self.fig = fig if fig is not None else Figure(figsize=(12, 2.5 * num_days))
+        self.axes = self.fig.subplots(num_days, 1, sharex=True, squeeze=False)[:, 0]
+        self.data_artists = []
+        self.day_texts = []
+
+        # The two-line title is laid out with a representative text and filled in by render
+        self.title = self.fig.suptitle(
+            "Wochenbericht vom 00.00.0000 - 00.00.0000  Monteur: Monteur  Woche: 00\n"
+            "Bitte um Einhaltung der gesetzlich vorgeschriebenen Mittagspause von 30 min nach 6 Arbeitsstunden!",
+            fontsize=14, y=0.98)
+
+        num_types = len(ACTIVITY_MAPPING)
+        for ax in self.axes:
+            # Set up the Y-axis for activity types
+            ax.set_yticks(list(ACTIVITY_MAPPING.values()))
+            ax.set_yticklabels(list(ACTIVITY_MAPPING.keys()))
+            ax.set_ylim(-0.5, num_types - 0.5) # Adjust y-limits to center labels
+
+            # Set up the X-axis for hours with quarter-hour steps
+            ax.set_xticks(range(0, 25, 1))
+            ax.set_xticks(QUARTER_HOURS, minor=True)
+            ax.set_xlim(0, 24)
+            ax.tick_params(axis='x', length=4, labelbottom=True)
+
+            # Add grid lines for major ticks (full hours) and minor ticks (quarter hours)
+            ax.grid(axis='x', which='major', linestyle='-', alpha=0.7)
+            ax.grid(axis='x', which='minor', linestyle=':', alpha=0.5)
+
+            # Day label on the left and daily summary (total hours and kilometers) on the right.
+            # They are laid out with the widest expected texts and filled in by render.
+            self.day_texts.append((
+                ax.text(-1.5, (num_types - 1) / 2, "Donnerstag", va='center', ha='right', fontsize=10, weight='bold', rotation=90),
+                ax.text(24.5, (num_types * 2 / 3) - 0.5, "Std. 00.00", va='center', ha='left', fontsize=10),
+                ax.text(24.5, (num_types * 1 / 3) - 0.5, "km 0000.00", va='center', ha='left', fontsize=10)
+            ))
+
+            # Remove spines
+            ax.spines['right'].set_visible(False)
+            ax.spines['top'].set_visible(False)
+            ax.spines['left'].set_visible(False)
+            ax.spines['bottom'].set_visible(False)
+
+        # Weekly summary at the bottom
+        self.total_text = self.fig.text(0.85, 0.02, "", ha='right', va='center', fontsize=12, weight='bold')
+
+        self.fig.tight_layout(rect=[0, 0.05, 1, 0.95])
+
+    def render(self, diagram, days):
+        """
+        Replaces the data of the template with the given days of a week.
+
+        Args:
+            diagram (logbook): The diagram whose week is drawn.
+            days (list): The English names of the days to plot, one per subplot.
+
+        Returns:
+            Figure: The template figure.
+        """
+        for artist in self.data_artists:
+            artist.remove()
+        self.data_artists = []
+
+        week = diagram.weeklylog
+        self.title.set_text(
+            f"Wochenbericht vom {week.date_range}  Monteur: {week.monteur}  Woche: {week.week_number}\n"
+            f"Bitte um Einhaltung der gesetzlich vorgeschriebenen Mittagspause von 30 min nach 6 Arbeitsstunden!"
+        )
+
+        total_weekly_hours = 0
+        for ax, (day_label, hours_text, km_text), day in zip(self.axes, self.day_texts, days):
+            daily_data = week.days[day]
+            self.data_artists.extend(diagram.draw_activities(ax, diagram.sorted_activities(day)))
+
+            day_label.set_text(diagram.day_names.get(day))
+            hours_text.set_text(f"Std. {daily_data.total_hours:.2f}")
+            km_text.set_text(f"km {daily_data.km:.2f}")
+            total_weekly_hours += daily_data.total_hours
+
+        self.total_text.set_text(f"Gesamt-Stunden: {total_weekly_hours:.2f}")
+        return self.fig
+
+    def release(self):
+        """Removes all artists from the figure, so that its memory can be freed."""
+        self.data_artists = []
+        self.fig.clear()
+
+
+def release_templates():
+    """Releases all cached diagram templates."""
+    for template in templates.values():
+        template.release()
+    templates.clear()
@@ -1,18 +1,36 @@
 import customtkinter as ctk
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 import json
 import tkinter as tk
 from tkinter import filedialog
 from tkinter import messagebox
-import matplotlib.pyplot as plt
 import datetime
-import numpy as np
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+import multiprocessing
+import os
+import time
+from weeklylog import Week, Activity, DAYS_OF_WEEK, DAYS_OF_WEEK_DE, parse_number
+from activitylist import ActivityListView
+from compliance import check_day
+from journal import Journal, meta_of
+from undolog import UndoLog, activity_values, meta_values
 
 # Set the appearance mode and default color theme
 ctk.set_appearance_mode("System")  # Modes: "System", "Dark", "Light"
 ctk.set_default_color_theme("blue")  # Themes: "blue", "dark-blue", "green"
 
+# The local archive of all saved weeks, next to the application
+ARCHIVE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "wochenarchiv.db")
+
+# Rendered diagrams, reused as long as the week does not change
+RENDER_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "diagrammcache")
+
+# The resolution of the diagrams shown in the app
+DIAGRAM_DPI = 80
+
+# The autosave journal of the current session
+AUTOSAVE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "autosave")
+
 class ActivityLogApp(ctk.CTk):
     """
     A CustomTkinter application for logging daily activities.
@@ -27,7 +45,7 @@ class ActivityLogApp(ctk.CTk):
     create a matplotlib diagram of the weekly logbook data.
     """
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, prewarm_renderer=True, autosave=True, **kwargs):
         super().__init__(*args, **kwargs)
 
         self.title("Tägliches Aktivitäten-Protokoll")
@@ -38,8 +56,8 @@ class ActivityLogApp(ctk.CTk):
         self.grid_rowconfigure(0, weight=1)
 
         # German day names mapping
-        self.days_of_week_en = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        self.days_of_week_de = ['Montag', 'Dienstag', 'Mittwoch', 'Donnerstag', 'Freitag', 'Samstag', 'Sonntag']
+        self.days_of_week_en = DAYS_OF_WEEK
+        self.days_of_week_de = DAYS_OF_WEEK_DE
         self.day_mapping = dict(zip(self.days_of_week_en, self.days_of_week_de))
         
         # Create a reverse mapping for easy lookup
@@ -48,17 +66,11 @@ class ActivityLogApp(ctk.CTk):
 
         # Dictionaries to hold widget references for each day
         self.day_widgets = defaultdict(dict)
-        self.activity_widgets = defaultdict(list)
+        self.activity_widgets = {}  # The ActivityListView of each day
+
+        # The in-memory week model is the source of truth; the widgets are bound to it
+        self.week = Week()
 
-        # Plotting-related properties
-        self.activity_mapping = {'A': 2, 'F': 1, 'P': 0}
-        self.colors = {'A': '#ff7f0e', 'F': '#1f77b4', 'P': '#d62728'}
-        
-        # Initialize date variables
-        self.monteur_name = ""
-        self.week_number = ""
-        self.date_range = ""
-        
         # Frame for metadata inputs (Monteur, Woche)
         self.metadata_frame = ctk.CTkFrame(self)
         self.metadata_frame.grid(row=0, column=0, padx=20, pady=(20, 0), sticky="ew")
@@ -67,6 +79,7 @@ class ActivityLogApp(ctk.CTk):
         ctk.CTkLabel(self.metadata_frame, text="Monteur:").grid(row=0, column=0, padx=(10, 5), pady=10, sticky="w")
         self.monteur_entry = ctk.CTkEntry(self.metadata_frame, placeholder_text="Name")
         self.monteur_entry.grid(row=0, column=1, padx=5, pady=10, sticky="ew")
+        self.monteur_entry.bind("<KeyRelease>", self.update_monteur_from_entry)
 
         ctk.CTkLabel(self.metadata_frame, text="Startdatum (Montag):").grid(row=0, column=2, padx=(10, 5), pady=10, sticky="w")
         self.start_date_entry = ctk.CTkEntry(self.metadata_frame, placeholder_text="TT.MM.JJJJ")
@@ -78,19 +91,36 @@ class ActivityLogApp(ctk.CTk):
 
         self.week_number_label = ctk.CTkLabel(self.metadata_frame, text="Kalenderwoche:", font=ctk.CTkFont(size=12))
         self.week_number_label.grid(row=0, column=5, padx=(10, 5), pady=10, sticky="w")
+
+        # Buttons to flip to the previous or next week of the technician
+        self.previous_week_button = ctk.CTkButton(self.metadata_frame, text="◀ Vorherige Woche", command=lambda: self.navigate_week(-1))
+        self.previous_week_button.grid(row=1, column=2, padx=5, pady=(0, 10), sticky="ew")
+        self.next_week_button = ctk.CTkButton(self.metadata_frame, text="Nächste Woche ▶", command=lambda: self.navigate_week(1))
+        self.next_week_button.grid(row=1, column=3, padx=5, pady=(0, 10), sticky="ew")
+
+        # Weeks around the current one, loaded from the archive in the background.
+        # Created when the first valid start date is entered.
+        self.week_cache = None
+        self.week_modified = False  # Whether the current week was edited since it was loaded or saved
         
         # TabView for different days
-        self.day_tabs = ctk.CTkTabview(self, width=1000, height=600)
+        self.day_tabs = ctk.CTkTabview(self, width=1000, height=600, command=self.on_day_tab_selected)
         self.day_tabs.grid(row=1, column=0, padx=20, pady=20, sticky="nsew")
 
-        # Create tabs for each day of the week with German names
+        # Create tabs for each day of the week with German names.
+        # The content of a tab is only built when it is selected for the first time;
+        # until then an inexpensive placeholder is shown.
+        self.tab_placeholders = {}
         for day_en, day_de in self.day_mapping.items():
             self.day_tabs.add(day_de)
             self.day_tabs.tab(day_de).grid_columnconfigure(0, weight=1)
-            self.create_day_tab_content(self.day_tabs.tab(day_de), day_en)
+            placeholder = ctk.CTkLabel(self.day_tabs.tab(day_de), text=f"{day_de} wird geladen ...")
+            placeholder.grid(row=0, column=0, padx=10, pady=10)
+            self.tab_placeholders[day_en] = placeholder
 
         # Set the default tab to 'Montag'
         self.day_tabs.set(self.current_day_de)
+        self.build_day_tab(self.reverse_day_mapping[self.current_day_de])
 
         # Add buttons and output labels to the bottom of the main window
         self.button_frame = ctk.CTkFrame(self)
@@ -118,14 +148,146 @@ class ActivityLogApp(ctk.CTk):
         self.plot_button = ctk.CTkButton(self.button_frame, text="Diagramm erstellen", command=self.create_and_show_diagram)
         self.plot_button.grid(row=0, column=5, padx=10, pady=10)
 
+        # Button to show or hide the live diagram below the buttons
+        self.live_diagram_button = ctk.CTkButton(self.button_frame, text="Live-Diagramm", command=self.toggle_diagram_panel)
+        self.live_diagram_button.grid(row=0, column=6, padx=10, pady=10)
+
+        # Buttons for the local week archive
+        self.archive_save_button = ctk.CTkButton(self.button_frame, text="Im Archiv speichern", command=self.save_to_archive)
+        self.archive_save_button.grid(row=1, column=0, padx=10, pady=(0, 10))
+
+        self.archive_open_button = ctk.CTkButton(self.button_frame, text="Aus Archiv öffnen", command=self.open_from_archive)
+        self.archive_open_button.grid(row=1, column=1, padx=10, pady=(0, 10))
+
+        # Undo and redo of the edits of the current week
+        self.undo_log = UndoLog()
+        self.undo_button = ctk.CTkButton(self.button_frame, text="Rückgängig", command=self.undo)
+        self.undo_button.grid(row=1, column=2, padx=10, pady=(0, 10))
+        self.redo_button = ctk.CTkButton(self.button_frame, text="Wiederholen", command=self.redo)
+        self.redo_button.grid(row=1, column=3, padx=10, pady=(0, 10))
+        self.bind("<Control-z>", lambda event: self.undo())
+        self.bind("<Control-y>", lambda event: self.redo())
+        self.bind("<Control-Z>", lambda event: self.redo())
+
         self.total_hours_label = ctk.CTkLabel(self.button_frame, text="Gesamte Arbeitsstunden: 0.0", font=ctk.CTkFont(size=16, weight="bold"))
-        self.total_hours_label.grid(row=1, column=0, columnspan=6, padx=10, pady=(0, 10))
+        self.total_hours_label.grid(row=2, column=0, columnspan=7, padx=10, pady=(0, 10))
+
+        # The embedded live diagram is only created when it is shown for the first time
+        self.diagram_panel = None
+
+        # Created when the first diagram is requested. Diagrams are rendered in a
+        # worker process, so the window stays responsive meanwhile.
+        self.render_cache = None
+        self.render_executor = None
+        self.render_job = None  # The running render: future, cache key, format and callback
+
+        # Progress indicator of a running render, shown below the buttons
+        self.render_status_frame = ctk.CTkFrame(self.button_frame, fg_color="transparent")
+        self.render_status_frame.grid(row=3, column=0, columnspan=7, padx=10, pady=(0, 10))
+        ctk.CTkLabel(self.render_status_frame, text="Diagramm wird erstellt ...").grid(row=0, column=0, padx=5)
+        self.render_progress = ctk.CTkProgressBar(self.render_status_frame, mode="indeterminate")
+        self.render_progress.grid(row=0, column=1, padx=5)
+        ctk.CTkButton(self.render_status_frame, text="Abbrechen", width=100, command=self.cancel_render).grid(row=0, column=2, padx=5)
+        self.render_status_frame.grid_remove()
+
+        # Days whose totals have to be recalculated. Triggers only mark a day;
+        # the totals are recalculated once per idle cycle for all marked days.
+        self.dirty_days = set()
+        self.recalculation_id = None
+        self.recalculation_stats = {'requests': 0, 'runs': 0, 'seconds': 0.0}
+
+        # matplotlib and numpy are only imported by the render worker. Optionally the
+        # worker is started once the window is idle, so the first diagram does not wait for it.
+        if prewarm_renderer:
+            self.after_idle(self.prewarm_renderer)
+
+        # Every edit is appended to the autosave journal. The session of the last
+        # run (or crash) is restored from it.
+        self.journal = None
+        if autosave:
+            self.journal = Journal(AUTOSAVE_DIR, get_week=lambda: self.week)
+            restored_week = self.journal.restore()
+            if restored_week is not None:
+                self.load_week(restored_week)
+                print("Letzte Sitzung aus der automatischen Sicherung wiederhergestellt.")
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def prewarm_renderer(self):
+        """
+        Starts the render worker and lets it import the plotting stack, so that
+        neither the start of the application nor the first diagram waits for it.
+        The application process itself does not import matplotlib.
+        """
+        from rendercache import warm_up
+
+        self.start_render_executor().submit(warm_up)
+
+    def start_render_executor(self):
+        """
+        Returns the process pool that renders the diagrams, creating it on first use.
+        """
+        if self.render_executor is None:
+            # A fresh interpreter instead of a fork of the process running Tk and the autosave thread
+            self.render_executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+        return self.render_executor
+
+    def on_close(self):
+        """
+        Writes the pending autosave records and stops the render worker before
+        the window is closed.
+        """
+        if self.journal is not None:
+            self.journal.close()
+        if self.render_executor is not None:
+            self.render_executor.shutdown(wait=False, cancel_futures=True)
+        if self.week_cache is not None:
+            self.week_cache.close()
+        self.destroy()
+
+    def record_change(self, op, day_en=None, **data):
+        """
+        Appends a change record to the autosave journal, if autosave is enabled.
+
+        Args:
+            op (str): The kind of change, see Journal.
+            day_en (str, optional): The English day of the week that changed.
+            **data: The changed values.
+        """
+        self.week_modified = True
+        if self.journal is not None:
+            self.journal.append(dict(data, op=op, day=day_en))
+
+    def toggle_diagram_panel(self):
+        """
+        Shows or hides the embedded live diagram of the week.
+        """
+        if self.diagram_panel is None:
+            from diagrampanel import DiagramPanel
+            self.diagram_panel = DiagramPanel(self, get_week=lambda: self.week, height=300)
+        elif self.diagram_panel.winfo_ismapped():
+            self.diagram_panel.grid_remove()
+            return
+        self.diagram_panel.grid(row=3, column=0, padx=20, pady=(0, 20), sticky="nsew")
+        # Changes made while the panel was hidden were not drawn
+        self.diagram_panel.schedule_update()
+
+    def notify_day_changed(self, day_en=None):
+        """
+        Lets the live diagram redraw a changed day (or all days) once the
+        user pauses. Does nothing while the diagram is hidden.
+
+        Args:
+            day_en (str, optional): The English day of the week that changed.
+        """
+        if self.diagram_panel is not None and self.diagram_panel.winfo_ismapped():
+            self.diagram_panel.schedule_update(day_en)
 
     def update_week_info_from_date(self, event=None):
         """
         Parses the user-inputted date, validates it as a Monday, and calculates
         and displays the corresponding date range and calendar week.
         """
+        old_meta = meta_values(self.week)
         date_str = self.start_date_entry.get()
         try:
             start_date = datetime.datetime.strptime(date_str, "%d.%m.%Y").date()
@@ -135,18 +297,121 @@ class ActivityLogApp(ctk.CTk):
             
             end_date = start_date + datetime.timedelta(days=6)
             
-            self.date_range = f"{start_date.strftime('%d.%m.%Y')} - {end_date.strftime('%d.%m.%Y')}"
-            self.week_number = start_date.isocalendar()[1]
+            self.week.start_date = start_date.strftime('%d.%m.%Y')
+            self.week.date_range = f"{start_date.strftime('%d.%m.%Y')} - {end_date.strftime('%d.%m.%Y')}"
+            self.week.week_number = start_date.isocalendar()[1]
             
-            self.date_range_label.configure(text=f"Datumsbereich: {self.date_range}")
-            self.week_number_label.configure(text=f"Kalenderwoche: {self.week_number}")
+            self.date_range_label.configure(text=f"Datumsbereich: {self.week.date_range}")
+            self.week_number_label.configure(text=f"Kalenderwoche: {self.week.week_number}")
+            self.prefetch_adjacent_weeks(start_date)
 
         except ValueError:
             # Handle invalid date format or empty entry
             self.date_range_label.configure(text="Datumsbereich: Ungültiges Format")
             self.week_number_label.configure(text="Kalenderwoche: Ungültiges Format")
-            self.date_range = ""
-            self.week_number = ""
+            self.week.start_date = ""
+            self.week.date_range = ""
+            self.week.week_number = ""
+        if meta_values(self.week) != old_meta:
+            self.undo_log.record(('meta', None, old_meta, meta_values(self.week)))
+            self.record_change('meta', meta=meta_of(self.week))
+
+    def prefetch_adjacent_weeks(self, start_date):
+        """
+        Loads the previous and the next week of the technician from the archive
+        in the background, so that flipping to them does not wait for the archive.
+
+        Args:
+            start_date (date): The Monday of the current week.
+        """
+        from weekcache import WeekCache
+
+        if self.week_cache is None:
+            self.week_cache = WeekCache(ARCHIVE_PATH)
+        for offset in (1, -1):
+            self.week_cache.prefetch(self.week.monteur, start_date + datetime.timedelta(weeks=offset))
+
+    def navigate_week(self, offset):
+        """
+        Shows the week before or after the current one, for the same technician.
+        The week is taken from the archive (a new empty week if it is not
+        archived), usually already prefetched. An edited current week is saved
+        in the archive first and stays cached, so flipping back is instant.
+
+        Args:
+            offset (int): -1 for the previous week, 1 for the next week.
+        """
+        try:
+            start_date = datetime.datetime.strptime(self.week.start_date, "%d.%m.%Y").date()
+        except ValueError:
+            messagebox.showerror("Fehler", "Bitte geben Sie ein gültiges Startdatum (Montag) ein.")
+            return
+        if self.week_modified:
+            self.save_to_archive()
+        self.prefetch_adjacent_weeks(start_date)  # Creates the cache if needed
+        self.week_cache.put(self.week)
+        self.load_week(self.week_cache.take(self.week.monteur, start_date + datetime.timedelta(weeks=offset)))
+        print(f"Woche {self.week.date_range} angezeigt "
+              f"(Cache: {self.week_cache.hits} Treffer, {self.week_cache.misses} Fehlschläge).")
+
+    def update_monteur_from_entry(self, event=None):
+        """
+        Copies the technician name from the entry into the week model.
+        """
+        if self.week.monteur != self.monteur_entry.get():
+            old_meta = meta_values(self.week)
+            self.week.monteur = self.monteur_entry.get()
+            self.undo_log.record(('meta', None, old_meta, meta_values(self.week)))
+            self.record_change('meta', meta=meta_of(self.week))
+
+    def on_day_tab_selected(self):
+        """
+        Builds the content of the selected day tab if it has not been built yet.
+        """
+        self.build_day_tab(self.reverse_day_mapping[self.day_tabs.get()])
+
+    def build_day_tab(self, day_en):
+        """
+        Replaces the placeholder of a day tab with its input widgets and fills
+        them from the week model. Does nothing if the tab was already built.
+
+        Args:
+            day_en (str): The English day of the week (used for data keys).
+        """
+        if day_en in self.activity_widgets:
+            return
+        self.tab_placeholders.pop(day_en).destroy()
+        self.create_day_tab_content(self.day_tabs.tab(self.day_mapping[day_en]), day_en)
+        self.show_day(day_en)
+
+    def show_day(self, day_en):
+        """
+        Fills the widgets of a built day tab from the week model.
+
+        Args:
+            day_en (str): The English day of the week (used for data keys).
+        """
+        self.show_day_totals(day_en)
+
+        # Bind the activity list to the day; only the visible rows are filled
+        self.activity_widgets[day_en].set_day(self.week.days[day_en])
+        self.update_compliance(day_en)
+
+    def show_day_totals(self, day_en):
+        """
+        Fills the total hours and km entries of a built day tab from the week model.
+
+        Args:
+            day_en (str): The English day of the week (used for data keys).
+        """
+        day = self.week.days[day_en]
+        total_hours_entry = self.day_widgets[day_en]['total_hours_entry']
+        km_entry = self.day_widgets[day_en]['km_entry']
+        total_hours_entry.delete(0, ctk.END)
+        km_entry.delete(0, ctk.END)
+        if day.activities or day.total_hours or day.km:
+            total_hours_entry.insert(0, str(day.total_hours))
+            km_entry.insert(0, str(day.km))
 
     def create_day_tab_content(self, parent_frame, day_en):
         """
@@ -159,11 +424,16 @@ class ActivityLogApp(ctk.CTk):
         # Get the German day name from the mapping
         day_de = self.day_mapping.get(day_en, day_en)
 
-        # Create a scrollable frame for activities
-        scrollable_frame = ctk.CTkScrollableFrame(parent_frame)
-        scrollable_frame.grid(row=2, column=0, columnspan=2, padx=10, pady=(10, 0), sticky="nsew")
-        scrollable_frame.grid_columnconfigure((0, 1, 2, 3, 4), weight=1)
-        self.activity_widgets[day_en] = {'frame': scrollable_frame, 'entries': []}
+        # Create a virtualized, scrollable list for activities
+        activity_list = ActivityListView(
+            parent_frame,
+            on_row_changed=lambda row, d=day_en: self.on_activity_row_changed(d, row),
+            on_row_edited=lambda row, d=day_en: self.update_activity_from_row(d, row),
+            on_remove=lambda activity_id, position, d=day_en: self.remove_activity_row(d, activity_id, position)
+        )
+        activity_list.grid(row=2, column=0, columnspan=2, padx=10, pady=(10, 0), sticky="nsew")
+        parent_frame.grid_rowconfigure(2, weight=1)
+        self.activity_widgets[day_en] = activity_list
 
         # Header for the inputs
         ctk.CTkLabel(parent_frame, text=f"{day_de} Protokolleintrag", font=ctk.CTkFont(size=20, weight="bold")).grid(row=0, column=0, padx=10, pady=(10, 5), sticky="w")
@@ -177,12 +447,14 @@ class ActivityLogApp(ctk.CTk):
         total_hours_entry = ctk.CTkEntry(info_frame)
         total_hours_entry.grid(row=0, column=1, padx=5, pady=5, sticky="ew")
         # Bind the update function to the FocusOut event for live updates
-        total_hours_entry.bind("<FocusOut>", lambda event, d=day_en: self.calculate_day_working_hours(d))
+        total_hours_entry.bind("<FocusOut>", lambda event, d=day_en: self.schedule_recalculation(d))
+        total_hours_entry.bind("<KeyRelease>", lambda event, d=day_en: self.update_day_info_from_widgets(d))
         self.day_widgets[day_en]['total_hours_entry'] = total_hours_entry
 
         ctk.CTkLabel(info_frame, text="Kilometer:").grid(row=0, column=2, padx=5, pady=5, sticky="w")
         km_entry = ctk.CTkEntry(info_frame)
         km_entry.grid(row=0, column=3, padx=5, pady=5, sticky="ew")
+        km_entry.bind("<KeyRelease>", lambda event, d=day_en: self.update_day_info_from_widgets(d))
         self.day_widgets[day_en]['km_entry'] = km_entry
         
         # New button to manually calculate hours for the current day
@@ -193,99 +465,140 @@ class ActivityLogApp(ctk.CTk):
         add_button = ctk.CTkButton(parent_frame, text="Aktivität hinzufügen", command=lambda: self.add_activity_row(day_en))
         add_button.grid(row=3, column=0, padx=10, pady=(5, 10))
 
+        # Violations of the break rule and inconsistent times of the day
+        compliance_label = ctk.CTkLabel(parent_frame, text="", text_color="#d62728", justify="left", anchor="w")
+        compliance_label.grid(row=4, column=0, padx=10, pady=(0, 10), sticky="w")
+        self.day_widgets[day_en]['compliance_label'] = compliance_label
+
+    def update_day_info_from_widgets(self, day_en):
+        """
+        Copies the total hours and km entries of a day into the week model.
+
+        Args:
+            day_en (str): The English day of the week (used for data keys).
+        """
+        day = self.week.days[day_en]
+        old_values = (day.total_hours, day.km)
+        day.total_hours = parse_number(self.day_widgets[day_en]['total_hours_entry'].get(), 0.0)
+        day.km = parse_number(self.day_widgets[day_en]['km_entry'].get(), 0.0)
+        if (day.total_hours, day.km) != old_values:
+            self.undo_log.record(('day', day_en, old_values, (day.total_hours, day.km)))
+            self.record_change('day', day_en, total_hours=day.total_hours, km=day.km)
+
     def add_activity_row(self, day_en, activity_data=None):
         """
-        Adds a new row of activity input widgets for the specified day.
+        Adds a new activity to the model and shows it in the day's list.
         
         Args:
             day_en (str): The English day of the week (used for data keys).
             activity_data (dict, optional): Initial data for the activity.
         """
-        container = self.activity_widgets[day_en]['frame']
-        row_count = len(self.activity_widgets[day_en]['entries'])
-
-        # Frame for a single activity row
-        activity_frame = ctk.CTkFrame(container, fg_color="transparent")
-        activity_frame.grid(row=row_count, column=0, columnspan=5, padx=5, pady=5, sticky="ew")
-        activity_frame.grid_columnconfigure((0, 1, 2, 3), weight=1)
-
-        # Type dropdown
-        type_options = ['F', 'A', 'P']
-        type_dropdown = ctk.CTkOptionMenu(activity_frame, values=type_options, command=lambda value, d=day_en: self.calculate_day_working_hours(d))
-        type_dropdown.grid(row=0, column=0, padx=5, pady=5, sticky="ew")
-        
-        # Start time entry
-        start_entry = ctk.CTkEntry(activity_frame, placeholder_text="Startzeit")
-        start_entry.grid(row=0, column=1, padx=5, pady=5, sticky="ew")
-        start_entry.bind("<FocusOut>", lambda event, d=day_en: self.calculate_day_working_hours(d))
-        
-        # End time entry
-        end_entry = ctk.CTkEntry(activity_frame, placeholder_text="Endzeit")
-        end_entry.grid(row=0, column=2, padx=5, pady=5, sticky="ew")
-        end_entry.bind("<FocusOut>", lambda event, d=day_en: self.calculate_day_working_hours(d))
-        
-        # Note entry
-        note_entry = ctk.CTkEntry(activity_frame, placeholder_text="Notiz")
-        note_entry.grid(row=0, column=3, padx=5, pady=5, sticky="ew")
-        
-        # Remove button
-        remove_button = ctk.CTkButton(activity_frame, text="X", width=30, command=lambda: self.remove_activity_row(day_en, activity_frame))
-        remove_button.grid(row=0, column=4, padx=5, pady=5)
-
-        # Populate with data if provided
-        if activity_data:
-            type_dropdown.set(activity_data.get('type', type_options[0]))
-            start_entry.insert(0, str(activity_data.get('start', '')))
-            end_entry.insert(0, str(activity_data.get('end', '')))
-            note_entry.insert(0, activity_data.get('note', ''))
-        
-        # Store all widgets for this activity row
-        activity_widgets = {
-            'frame': activity_frame,
-            'type': type_dropdown,
-            'start': start_entry,
-            'end': end_entry,
-            'note': note_entry
-        }
-        self.activity_widgets[day_en]['entries'].append(activity_widgets)
-
-        # Scroll to the bottom of the frame after adding a new row
-        container.update_idletasks()
+        activity = Activity.from_dict(activity_data) if activity_data else Activity()
+        day = self.week.days[day_en]
+        day.add_activity(activity)
+        self.undo_log.record(('insert', day_en, activity, len(day.activities) - 1))
+        self.record_change('add', day_en, id=activity.id, activity=activity.to_dict())
+
+        # Scroll to the bottom of the list to show the new row
+        activity_list = self.activity_widgets.get(day_en)
+        if activity_list:
+            activity_list.insert(activity, len(day.activities) - 1)
+            activity_list.scroll_to_end()
         
         # Recalculate total hours for the day and the week
-        self.calculate_day_working_hours(day_en)
+        self.schedule_recalculation(day_en)
 
-    def remove_activity_row(self, day_en, activity_frame):
+    def update_activity_from_row(self, day_en, row):
         """
-        Removes an activity row and its associated widgets.
+        Copies the current widget values of an activity row into its model activity.
+        The times are parsed into minutes once per change of their text, and the
+        cached day subtotal is updated by the difference of this single row.
+
+        Args:
+            day_en (str): The English day of the week (used for data keys).
+            row (dict): The widgets of the activity row, including the bound 'activity'.
         """
-        for i, activity_data in enumerate(self.activity_widgets[day_en]['entries']):
-            if activity_data['frame'] == activity_frame:
-                # Destroy all widgets in the row
-                activity_frame.destroy()
-                # Remove the entry from the list
-                del self.activity_widgets[day_en]['entries'][i]
-                break
+        activity = row['activity']
+        if activity is None:
+            return
+        activity_list = self.activity_widgets[day_en]
+        values = (row['type'].get(), activity_list.time_of(row, 'start'), activity_list.time_of(row, 'end'), row['note'].get())
+        old_values = activity_values(activity)
+        if values == old_values:
+            return  # E.g. the focus left an entry without an edit
+        self.week.days[day_en].update_activity_minutes(activity, *values)
+        self.undo_log.record(('edit', day_en, activity, old_values, values))
+        self.record_change('edit', day_en, id=activity.id, activity=activity.to_dict())
+        self.notify_day_changed(day_en)
+
+    def on_activity_row_changed(self, day_en, row):
+        """
+        Updates the model from an edited activity row and recalculates the totals.
+        """
+        self.update_activity_from_row(day_en, row)
+        self.undo_log.seal()  # The next edit of the row is undone separately
+        self.schedule_recalculation(day_en)
+
+    def remove_activity_row(self, day_en, activity_id, position):
+        """
+        Removes an activity from the model and from the day's list.
+
+        Args:
+            day_en (str): The English day of the week (used for data keys).
+            activity_id (int): The id of the activity shown in the row.
+            position (int): The position of the activity in the day.
+        """
+        self.undo_log.record(('delete', day_en, self.week.days[day_en].remove_activity(activity_id), position))
+        self.record_change('remove', day_en, id=activity_id)
+        # The row widgets are kept and rebound to the remaining activities
+        activity_list = self.activity_widgets.get(day_en)
+        if activity_list:
+            activity_list.remove(position)
         
         # Recalculate total hours for the day and the week
-        self.calculate_day_working_hours(day_en)
+        self.schedule_recalculation(day_en)
+
+    def schedule_recalculation(self, day_en):
+        """
+        Marks a day for recalculation of its totals. All days marked until the
+        application is idle are recalculated together, so tabbing through a row
+        (several FocusOut events) costs one recalculation instead of one per event.
+
+        Args:
+            day_en (str): The English day of the week (used for data keys).
+        """
+        self.recalculation_stats['requests'] += 1
+        self.dirty_days.add(day_en)
+        if self.recalculation_id is None:
+            self.recalculation_id = self.after_idle(self.flush_recalculation)
+
+    def flush_recalculation(self):
+        """
+        Recalculates the totals of all marked days right away. Called when the
+        application is idle, and before anything that reads the totals
+        (saving, exporting, plotting).
+        """
+        if self.recalculation_id is not None:
+            self.after_cancel(self.recalculation_id)
+            self.recalculation_id = None
+        if not self.dirty_days:
+            return
+        start_time = time.perf_counter()
+        dirty_days, self.dirty_days = self.dirty_days, set()
+        for day_en in dirty_days:
+            self.calculate_day_working_hours(day_en)
+        self.recalculation_stats['runs'] += 1
+        self.recalculation_stats['seconds'] += time.perf_counter() - start_time
 
     def calculate_day_working_hours(self, day_en):
         """
-        Calculates the total working hours for a specific day and updates the entry box.
-        This calculation excludes break activities ('P').
-        It also triggers a recalculation of the total weekly hours.
-        """
-        total_hours = 0.0
-        for activity_entry_set in self.activity_widgets[day_en]['entries']:
-            if activity_entry_set['type'].get() != 'P':
-                try:
-                    start = float(activity_entry_set['start'].get())
-                    end = float(activity_entry_set['end'].get())
-                    if end > start:
-                        total_hours += (end - start)
-                except ValueError:
-                    continue
+        Shows the total working hours for a specific day in the entry box.
+        This total excludes break activities ('P') and is read from the cached
+        day subtotal, so no other row or day is touched.
+        It also refreshes the label with the total weekly hours.
+        """
+        day = self.week.days[day_en]
+        total_hours = day.working_hours()
         
         # Get the German tab name from the English key
         day_de = self.day_mapping.get(day_en)
@@ -297,9 +610,36 @@ class ActivityLogApp(ctk.CTk):
             if total_hours_entry:
                 total_hours_entry.delete(0, ctk.END)
                 total_hours_entry.insert(0, f"{total_hours:.2f}")
+                if day.total_hours != round(total_hours, 2):
+                    day.total_hours = round(total_hours, 2)
+                    self.record_change('day', day_en, total_hours=day.total_hours, km=day.km)
 
-        # Recalculate total weekly hours after any daily change
-        self.calculate_all_working_hours()
+        # Refresh the total weekly hours, the checks and the live diagram after any daily change
+        self.update_total_hours_label()
+        self.update_compliance(day_en)
+        self.notify_day_changed(day_en)
+
+    def update_compliance(self, day_en):
+        """
+        Checks the activities of a day for break rule violations, overlapping
+        and negative times, and shows the violations below the day's activities.
+        Only the given day is checked.
+
+        Args:
+            day_en (str): The English day of the week (used for data keys).
+        """
+        compliance_label = self.day_widgets[day_en].get('compliance_label')
+        if compliance_label is None:
+            return  # The tab was not built yet; it is checked when it is shown
+        violations = [str(finding) for finding in check_day(self.week.days[day_en]) if finding.is_violation()]
+        compliance_label.configure(text="\n".join(violations))
+
+    def update_total_hours_label(self):
+        """
+        Updates the label at the bottom of the window with the weekly total,
+        computed as the sum of the seven cached day subtotals.
+        """
+        self.total_hours_label.configure(text=f"Gesamte Arbeitsstunden: {self.week.working_hours():.2f}")
     
     def clear_all_data(self):
         """
@@ -315,9 +655,17 @@ class ActivityLogApp(ctk.CTk):
             if km_entry:
                 km_entry.delete(0, ctk.END)
             
-            # Remove all activity rows
-            for activity_data in list(self.activity_widgets[day_en]['entries']):
-                self.remove_activity_row(day_en, activity_data['frame'])
+        # Reset the model, including the metadata. The undo log keeps the cleared
+        # activities themselves, not a copy of them.
+        self.undo_log.record(('clear', None, meta_values(self.week), {
+            day_en: (day.total_hours, day.km, tuple(day.activities.values())) for day_en, day in self.week.days.items()
+        }))
+        self.week.clear()
+        self.record_change('clear')
+
+        # Hide all activity rows of the built tabs in one pass, without recalculating per row
+        for activity_list in self.activity_widgets.values():
+            activity_list.refresh()
 
         # Reset the total hours label
         self.total_hours_label.configure(text="Gesamte Arbeitsstunden: 0.0")
@@ -327,6 +675,84 @@ class ActivityLogApp(ctk.CTk):
         self.start_date_entry.delete(0, ctk.END)
         self.date_range_label.configure(text="Datumsbereich:")
         self.week_number_label.configure(text="Kalenderwoche:")
+        self.notify_day_changed()
+
+    def undo(self):
+        """
+        Reverts the last edit (or bulk operation such as "Alle Daten löschen").
+        """
+        change = self.undo_log.undo(self.week)
+        if change is not None:
+            self.show_change(change, undo=True)
+
+    def redo(self):
+        """
+        Applies the last undone edit again.
+        """
+        change = self.undo_log.redo(self.week)
+        if change is not None:
+            self.show_change(change, undo=False)
+
+    def show_change(self, change, undo):
+        """
+        Shows a change that was undone or redone in the model. Only the
+        affected days are rebound and recalculated, and the change is
+        appended to the autosave journal like any other edit.
+
+        Args:
+            change (tuple): The change, see UndoLog.
+            undo (bool): Whether the change was reverted.
+        """
+        op, day_en = change[0], change[1]
+        changed_days = [day_en]
+        activities_changed = op not in ('day', 'meta')
+        if op == 'meta':
+            changed_days = []
+            self.record_change('meta', meta=meta_of(self.week))
+        elif op == 'clear':
+            changed_days = self.days_of_week_en
+            if undo:
+                if self.journal is not None:
+                    self.journal.compact()
+                self.week_modified = True
+            else:
+                self.record_change('clear')
+        elif op == 'day':
+            day = self.week.days[day_en]
+            self.record_change('day', day_en, total_hours=day.total_hours, km=day.km)
+        elif op == 'edit':
+            self.record_change('edit', day_en, id=change[2].id, activity=change[2].to_dict())
+        elif (op == 'insert') == undo:
+            self.record_change('remove', day_en, id=change[2].id)
+        else:
+            self.record_change('add', day_en, id=change[2].id, activity=change[2].to_dict(), position=change[3])
+
+        if op in ('meta', 'clear'):
+            self.monteur_entry.delete(0, ctk.END)
+            self.monteur_entry.insert(0, self.week.monteur)
+            self.start_date_entry.delete(0, ctk.END)
+            self.start_date_entry.insert(0, self.week.start_date)
+            self.date_range_label.configure(text=f"Datumsbereich: {self.week.date_range}" if self.week.date_range else "Datumsbereich:")
+            self.week_number_label.configure(text=f"Kalenderwoche: {self.week.week_number}" if self.week.week_number else "Kalenderwoche:")
+        for day_en in changed_days:
+            activity_list = self.activity_widgets.get(day_en)
+            if activity_list:
+                self.show_day_totals(day_en)
+                if op == 'clear':
+                    activity_list.refresh(force=True)
+                elif op in ('insert', 'delete'):
+                    if (op == 'insert') == undo:
+                        activity_list.remove(change[3])
+                    else:
+                        activity_list.insert(change[2], change[3])
+                else:
+                    # The same activity has new values, so the visible rows are rewritten
+                    activity_list.scroll_to(activity_list.first, force=True)
+            if activities_changed:
+                self.schedule_recalculation(day_en)
+            else:
+                self.notify_day_changed(day_en)
+        self.update_total_hours_label()
 
     def load_from_json(self):
         """
@@ -344,77 +770,60 @@ class ActivityLogApp(ctk.CTk):
             with open(file_path, 'r', encoding='utf-8') as f:
                 loaded_data = json.load(f)
             
-            self.clear_all_data() # Clear existing data first
-
-            for day_en in self.days_of_week_en:
-                if day_en in loaded_data:
-                    data = loaded_data[day_en]
-
-                    # Update the total hours and km entries for the day
-                    total_hours_entry = self.day_widgets[day_en]['total_hours_entry']
-                    km_entry = self.day_widgets[day_en]['km_entry']
-                    
-                    total_hours_entry.delete(0, ctk.END)
-                    total_hours_entry.insert(0, str(data.get('total_hours', 0)))
-                    
-                    km_entry.delete(0, ctk.END)
-                    km_entry.insert(0, str(data.get('km', 0)))
-
-                    # Populate activities
-                    for activity in data.get('activities', []):
-                        self.add_activity_row(day_en, activity)
-            
-            # After loading, recalculate the total hours for the entire week
-            self.calculate_all_working_hours()
+            self.load_week(Week.from_dict(loaded_data))
             print(f"Daten erfolgreich aus {file_path} geladen.")
 
-        except (IOError, json.JSONDecodeError) as e:
+        except (IOError, ValueError) as e:
             print(f"Fehler beim Laden der Datei: {e}")
 
+    def load_week(self, week):
+        """
+        Replaces the current data with a week model and shows it.
+
+        The existing widgets are kept: the entries are refilled and the activity
+        lists of the built tabs are rebound in one batch without intermediate
+        recalculation or idle-task flushing; the totals are computed once at the
+        end. Tabs that were never opened read the model when they are built.
+
+        Args:
+            week (Week): The week to show.
+        """
+        self.flush_recalculation()  # Pending totals belong to the previous week
+        self.week = week
+
+        # Show the metadata of the week, if the file contains any
+        self.monteur_entry.delete(0, ctk.END)
+        self.monteur_entry.insert(0, week.monteur)
+        self.start_date_entry.delete(0, ctk.END)
+        if week.start_date:
+            self.start_date_entry.insert(0, week.start_date)
+            self.update_week_info_from_date()
+        else:
+            self.date_range_label.configure(text="Datumsbereich:")
+            self.week_number_label.configure(text="Kalenderwoche:")
+
+        for day_en in self.activity_widgets:
+            self.show_day(day_en)
+
+        # After loading, calculate the totals once for the entire week
+        self.dirty_days.update(self.days_of_week_en)
+        self.calculate_all_working_hours()
+
+        # Start the autosave journal over with a snapshot of the loaded week
+        if self.journal is not None:
+            self.journal.compact()
+        self.week_modified = False
+        self.undo_log.clear()  # The edits of the previous week cannot be undone on this one
+
     def collect_data(self):
         """
-        Collects all data from the GUI and returns it in the desired dictionary format.
+        Collects all data from the week model and returns it in the desired dictionary format.
+        Activities with invalid times are skipped.
         
         Returns:
             dict: The final dictionary with all the collected data.
         """
-        final_data = {}
-        for day_en in self.days_of_week_en:
-            day_data = {}
-            
-            # Get total hours and km from the day_widgets dictionary
-            total_hours_entry = self.day_widgets[day_en].get('total_hours_entry')
-            km_entry = self.day_widgets[day_en].get('km_entry')
-            
-            try:
-                day_data['total_hours'] = float(total_hours_entry.get())
-            except (ValueError, AttributeError):
-                day_data['total_hours'] = 0.0 # Default to 0 if input is not a number or widget not found
-            
-            try:
-                day_data['km'] = float(km_entry.get())
-            except (ValueError, AttributeError):
-                day_data['km'] = 0.0 # Default to 0 if input is not a number or widget not found
-
-            # Collect activity data
-            activities = []
-            for activity_entry_set in self.activity_widgets[day_en]['entries']:
-                try:
-                    activity = {
-                        'type': activity_entry_set['type'].get(),
-                        'start': float(activity_entry_set['start'].get()),
-                        'end': float(activity_entry_set['end'].get()),
-                        'note': activity_entry_set['note'].get()
-                    }
-                    activities.append(activity)
-                except ValueError:
-                    # Skip entries with invalid numerical data
-                    print(f"Skipping an activity for {day_en} due to invalid numerical input.")
-            
-            day_data['activities'] = activities
-            final_data[day_en] = day_data
-            
-        return final_data
+        return self.week.to_dict()
 
     def save_and_print_data(self):
         """
@@ -437,33 +846,76 @@ class ActivityLogApp(ctk.CTk):
             title="Daten als JSON speichern"
         )
         if file_path:
-            collected_data = self.collect_data()
             try:
                 with open(file_path, 'w', encoding='utf-8') as f:
-                    json.dump(collected_data, f, indent=4, ensure_ascii=False)
+                    json.dump(self.week.to_dict(include_meta=True), f, indent=4, ensure_ascii=False)
                 print(f"Daten erfolgreich in {file_path} gespeichert.")
             except IOError as e:
                 print(f"Fehler beim Speichern der Datei: {e}")
 
+    def save_to_archive(self):
+        """
+        Saves the current week in the local archive, replacing an archived week
+        of the same technician and start date.
+        """
+        from archive import WeekArchive
+
+        if not self.week.start_date:
+            messagebox.showerror("Fehler", "Bitte geben Sie ein gültiges Startdatum (Montag) ein.")
+            return
+        self.calculate_all_working_hours() # Ensure the latest total is calculated
+        with WeekArchive(ARCHIVE_PATH) as archive:
+            archive.save_week(self.week)
+        self.week_modified = False
+        if self.week_cache is not None:
+            self.week_cache.forget(self.week)  # A cached copy of this week is outdated now
+        print(f"Woche {self.week.date_range} von {self.week.monteur} im Archiv gespeichert.")
+
+    def open_from_archive(self):
+        """
+        Shows the archived weeks of the technician entered above (or of all
+        technicians if the field is empty) and loads the selected one.
+        """
+        from archive import WeekArchive
+
+        with WeekArchive(ARCHIVE_PATH) as archive:
+            weeks = archive.find_weeks(monteur=self.monteur_entry.get() or None)
+        if not weeks:
+            messagebox.showinfo("Archiv", "Im Archiv wurden keine passenden Wochen gefunden.")
+            return
+
+        dialog = ctk.CTkToplevel(self)
+        dialog.title("Woche aus dem Archiv öffnen")
+        dialog.geometry("500x400")
+        week_list = ctk.CTkScrollableFrame(dialog)
+        week_list.pack(fill="both", expand=True, padx=10, pady=10)
+        for week_id, monteur, week_number, date_range in weeks:
+            ctk.CTkButton(
+                week_list, text=f"KW {week_number or '?'}  {date_range}  {monteur}", anchor="w",
+                command=lambda w=week_id: (dialog.destroy(), self.load_from_archive(w))
+            ).pack(fill="x", padx=5, pady=2)
+
+    def load_from_archive(self, week_id):
+        """
+        Loads a week from the local archive into the app.
+
+        Args:
+            week_id (int): The id of the week in the archive.
+        """
+        from archive import WeekArchive
+
+        with WeekArchive(ARCHIVE_PATH) as archive:
+            self.load_week(archive.load_week(week_id))
+        print(f"Woche {self.week.date_range} von {self.week.monteur} aus dem Archiv geladen.")
+
     def calculate_all_working_hours(self):
         """
         Calculates the total working hours from all activities, excluding breaks ('P'),
         for the entire week and updates the label at the bottom of the window.
+        Pending recalculations of single days are done first.
         """
-        collected_data = self.collect_data()
-        total_working_hours = 0.0
-        
-        for day_en, data in collected_data.items():
-            for activity in data.get('activities', []):
-                # Check if the activity is not a 'break'
-                if activity.get('type') != 'P':
-                    start_time = activity.get('start')
-                    end_time = activity.get('end')
-                    # Ensure start and end times are valid numbers before calculating
-                    if isinstance(start_time, (int, float)) and isinstance(end_time, (int, float)):
-                        duration = end_time - start_time
-                        if duration > 0:
-                            total_working_hours += duration
+        self.flush_recalculation()
+        total_working_hours = self.week.working_hours()
 
         # Update the label with the new total
         self.total_hours_label.configure(text=f"Gesamte Arbeitsstunden: {total_working_hours:.2f}")
@@ -473,116 +925,145 @@ class ActivityLogApp(ctk.CTk):
         """
         Creates a driver's logbook diagram using connected line segments (step plot)
         and displays it in a separate window.
+
+        The diagram is rendered in a worker process while the window stays usable;
+        see render_async.
         """
         # Ensure data is up to date before plotting
         self.calculate_all_working_hours()
-        log_data = self.collect_data()
 
-        # Get metadata from the new input fields
-        monteur = self.monteur_entry.get()
-        
         # Check if week info is available
-        if not self.date_range or not self.week_number:
+        if not self.week.date_range or not self.week.week_number:
              messagebox.showerror("Fehler", "Bitte geben Sie ein gültiges Startdatum (Montag) ein.")
              return
 
-        # Determine the number of days with activities to adjust plot size
-        days_with_activities = [day for day in self.days_of_week_en if log_data.get(day) and log_data[day].get('activities')]
-        num_days_to_plot = len(days_with_activities)
-        
         # If there are no activities to plot, inform the user and exit
-        if num_days_to_plot == 0:
+        if not any(activity.is_valid() for day in self.week.days.values() for activity in day.activities.values()):
             messagebox.showinfo("Keine Daten zum Plotten", "Bitte fügen Sie Aktivitäten hinzu, um ein Diagramm zu erstellen.")
             return
 
-        fig, axes = plt.subplots(num_days_to_plot, 1, figsize=(12, 2.5 * num_days_to_plot), sharex=True)
-        # Ensure axes is an iterable even for a single day
-        if num_days_to_plot == 1:
-            axes = [axes]
-        
-        fig.suptitle(
-            f"Wochenbericht vom {self.date_range}  Monteur: {monteur}  Woche: {self.week_number}\n"
-            f"Bitte um Einhaltung der gesetzlich vorgeschriebenen Mittagspause von 30 min nach 6 Arbeitsstunden!",
-            fontsize=14, y=0.98
-        )
-
-        total_weekly_hours = 0
-
-        for i, day in enumerate(days_with_activities):
-            ax = axes[i]
-            daily_data = log_data.get(day, {'activities': [], 'total_hours': 0, 'km': 0})
-            
-            # Sort activities by start time to ensure correct plotting order
-            sorted_activities = sorted(daily_data['activities'], key=lambda x: x['start'])
+        self.render_async('png', self.show_diagram)
 
-            # Plot activities and connect transitions
-            for j, activity in enumerate(sorted_activities):
-                start_time = activity['start']
-                end_time = activity['end']
-                activity_type = activity['type']
-                note = activity.get('note', '')
-
-                y_pos_current = self.activity_mapping.get(activity_type, 0)
+    def render_async(self, fmt, on_done):
+        """
+        Renders the diagram of the current week in a worker process and calls
+        on_done with the bytes once it is finished. Meanwhile a progress
+        indicator with a cancel button is shown and the window stays usable.
 
-                # Plot the horizontal line segment for the activity duration
-                ax.plot([start_time, end_time], [y_pos_current, y_pos_current],
-                        color=self.colors.get(activity_type, 'gray'), linewidth=4, solid_capstyle='butt')
+        The rendered diagram is cached by the content of the week, so an
+        unchanged week is passed to on_done right away, without any drawing.
 
-                # Add notes
-                if note:
-                    ax.text(start_time + (end_time - start_time) / 2, y_pos_current + 0.3, note,
-                            ha='center', va='bottom', fontsize=8, color='black')
+        Args:
+            fmt (str): 'png' or 'pdf'.
+            on_done (callable): Called with the rendered bytes.
+        """
+        from rendercache import RenderCache, render_week, week_key
 
-                # Check for next activity to draw connecting vertical line
-                if j < len(sorted_activities) - 1:
-                    next_activity = sorted_activities[j+1]
-                    next_start_time = next_activity['start']
-                    y_pos_next = self.activity_mapping.get(next_activity['type'], 0)
+        if self.render_job is not None:
+            return  # Only one render at a time
+        if self.render_cache is None:
+            self.render_cache = RenderCache(RENDER_CACHE_DIR)
 
-                    # If the next activity starts exactly where the current one ends
-                    if end_time == next_start_time:
-                        # Draw a vertical line from current activity's end to next activity's start
-                        # Use a neutral color like black for the connecting line
-                        ax.plot([end_time, next_start_time], [y_pos_current, y_pos_next],
-                                color='black', linewidth=1.5, linestyle='-')
+        key = week_key(self.week, fmt, DIAGRAM_DPI)
+        data = self.render_cache.get(key, fmt)
+        if data is not None:
+            on_done(data)
+            return
 
+        future = self.start_render_executor().submit(render_week, self.week.to_dict(include_meta=True), fmt, DIAGRAM_DPI)
+        self.render_job = (future, key, fmt, on_done)
 
-            # Set up the Y-axis for activity types
-            ax.set_yticks(list(self.activity_mapping.values()))
-            ax.set_yticklabels(list(self.activity_mapping.keys()))
-            ax.set_ylim(-0.5, len(self.activity_mapping) - 0.5) # Adjust y-limits to center labels
+        self.plot_button.configure(state="disabled")
+        self.render_status_frame.grid()
+        self.render_progress.start()
+        self.after(100, self.poll_render)
 
-            # Set up the X-axis for hours with quarter-hour steps
-            ax.set_xticks(range(0, 25, 1))
-            ax.set_xticks(np.arange(0, 24.25, 0.25), minor=True)
-            ax.set_xlim(0, 24)
-            ax.tick_params(axis='x', length=4, labelbottom=True)
+    def poll_render(self):
+        """
+        Checks whether the running render has finished, and if so, caches and shows the result.
+        """
+        if self.render_job is None:
+            return  # Cancelled
+        future, key, fmt, on_done = self.render_job
+        if not future.done():
+            self.after(100, self.poll_render)
+            return
 
-            # Add grid lines for major ticks (full hours) and minor ticks (quarter hours)
-            ax.grid(axis='x', which='major', linestyle='-', alpha=0.7)
-            ax.grid(axis='x', which='minor', linestyle=':', alpha=0.5)
+        self.end_render()
+        try:
+            data = future.result()
+        except Exception as e:
+            print(f"Fehler beim Erstellen des Diagramms: {e}")
+            return
+        self.render_cache.put(key, fmt, data)
+        stats = self.render_cache.stats()
+        print(f"Diagramm-Cache: {stats['hits']} Treffer, {stats['misses']} Fehlschläge, {stats['files']} Dateien")
+        on_done(data)
 
-            # Add day label on the left
-            ax.text(-1.5, (len(self.activity_mapping) - 1) / 2, self.day_mapping.get(day), va='center', ha='right', fontsize=10, weight='bold', rotation=90)
+    def cancel_render(self):
+        """
+        Cancels the running render. A render that has already started in the
+        worker is finished there, but its result is discarded.
+        """
+        if self.render_job is None:
+            return
+        self.render_job[0].cancel()
+        self.end_render()
+        print("Erstellung des Diagramms abgebrochen.")
+
+    def end_render(self):
+        """Hides the progress indicator of a finished or cancelled render."""
+        self.render_job = None
+        self.render_progress.stop()
+        self.render_status_frame.grid_remove()
+        self.plot_button.configure(state="normal")
+
+    def show_diagram(self, png):
+        """
+        Shows a rendered diagram in a separate, scrollable window.
 
-            # Add daily summary (total hours and kilometers)
-            ax.text(24.5, (len(self.activity_mapping) * 2 / 3) - 0.5, f"Std. {daily_data['total_hours']:.2f}", va='center', ha='left', fontsize=10)
-            ax.text(24.5, (len(self.activity_mapping) * 1 / 3) - 0.5, f"km {daily_data['km']:.2f}", va='center', ha='left', fontsize=10)
+        Args:
+            png (bytes): The diagram as PNG.
+        """
+        window = ctk.CTkToplevel(self)
+        window.title(f"Wochenbericht {self.week.date_range}")
+        window.geometry("1000x700")
 
-            total_weekly_hours += daily_data['total_hours']
+        image = tk.PhotoImage(data=png)
+        image_frame = ctk.CTkScrollableFrame(window)
+        image_frame.pack(fill="both", expand=True, padx=10, pady=(10, 0))
+        image_label = tk.Label(image_frame, image=image)
+        image_label.image = image  # Keep a reference, Tk does not
+        image_label.pack()
 
-            # Remove spines
-            ax.spines['right'].set_visible(False)
-            ax.spines['top'].set_visible(False)
-            ax.spines['left'].set_visible(False)
-            ax.spines['bottom'].set_visible(False)
+        ctk.CTkButton(window, text="Als PDF speichern", command=self.save_diagram_pdf).pack(pady=10)
 
+    def save_diagram_pdf(self):
+        """
+        Saves the diagram of the current week as a PDF file chosen by the user.
+        """
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".pdf",
+            filetypes=[("PDF files", "*.pdf"), ("All Files", "*.*")],
+            title="Diagramm als PDF speichern"
+        )
+        if file_path:
+            self.render_async('pdf', lambda data: self.write_diagram(file_path, data))
 
-        # Add weekly summary at the bottom
-        fig.text(0.85, 0.02, f"Gesamt-Stunden: {total_weekly_hours:.2f}", ha='right', va='center', fontsize=12, weight='bold')
+    def write_diagram(self, file_path, data):
+        """
+        Writes a rendered diagram to a file.
 
-        plt.tight_layout(rect=[0, 0.05, 1, 0.95])
-        plt.show()
+        Args:
+            file_path (str): The file to write.
+            data (bytes): The rendered diagram.
+        """
+        try:
+            with open(file_path, 'wb') as f:
+                f.write(data)
+            print(f"Diagramm erfolgreich in {file_path} gespeichert.")
+        except IOError as e:
+            print(f"Fehler beim Speichern der Datei: {e}")
 
 if __name__ == "__main__":
     app = ActivityLogApp()
@@ -0,0 +1,106 @@
+import math
+
+import numpy as np
+
+from weeklylog import BREAK_TYPE
+
+# A day has 96 quarter-hour slots, the same grid as the minor ticks of the diagram
+SLOTS_PER_DAY = 96
+SLOTS_PER_HOUR = 4
+# Bitmaps are stored in two 48-bit halves, so that SQLite can query them with its 64-bit integer operators
+HALF_SLOTS = SLOTS_PER_DAY // 2
+HALF_MASK = (1 << HALF_SLOTS) - 1
+
+
+def slot_of(hours):
+    """Returns the index of the quarter-hour slot that contains a time (in hours)."""
+    return min(max(int(hours * SLOTS_PER_HOUR), 0), SLOTS_PER_DAY - 1)
+
+
+def slot_mask(start, end):
+    """
+    Returns the bitmap of the quarter-hour slots touched by the time from start to end.
+    Bit i stands for the slot from i/4 to (i+1)/4 hours; a partly used slot counts as occupied.
+
+    Args:
+        start, end (float): The times in hours.
+
+    Returns:
+        int: The bitmap, 0 if the time is empty or negative.
+    """
+    first = max(math.floor(start * SLOTS_PER_HOUR), 0)
+    last = min(math.ceil(end * SLOTS_PER_HOUR), SLOTS_PER_DAY)
+    if last <= first:
+        return 0
+    return ((1 << (last - first)) - 1) << first
+
+
+def day_occupancy(day):
+    """
+    Compiles the activities of a day into one bitmap per activity type.
+
+    Args:
+        day (Day): The day.
+
+    Returns:
+        dict: The bitmap (int) per activity type that occurs on the day.
+    """
+    occupancy = {}
+    for activity in day.activities.values():
+        if activity.is_valid():
+            occupancy[activity.type] = occupancy.get(activity.type, 0) | slot_mask(activity.start, activity.end)
+    return occupancy
+
+
+def types_at(occupancy, hours):
+    """Returns the activity types that occupy the slot of a time, e.g. ['F'] at 14.25."""
+    bit = 1 << slot_of(hours)
+    return [activity_type for activity_type, mask in occupancy.items() if mask & bit]
+
+
+def hours_of(mask):
+    """Returns the hours covered by a bitmap."""
+    return bin(mask).count("1") / SLOTS_PER_HOUR
+
+
+def working_mask(occupancy):
+    """Returns the slots occupied by any activity other than a break ('P')."""
+    mask = 0
+    for activity_type, type_mask in occupancy.items():
+        if activity_type != BREAK_TYPE:
+            mask |= type_mask
+    return mask
+
+
+def conflicts(occupancy):
+    """Returns the slots that are occupied by more than one activity type."""
+    seen = conflicting = 0
+    for mask in occupancy.values():
+        conflicting |= seen & mask
+        seen |= mask
+    return conflicting
+
+
+def split(mask):
+    """Splits a bitmap into its lower and upper 48-bit halves."""
+    return mask & HALF_MASK, mask >> HALF_SLOTS
+
+
+def join(low, high):
+    """Joins the two 48-bit halves of a bitmap."""
+    return low | (high << HALF_SLOTS)
+
+
+def heatmap(lows, highs):
+    """
+    Counts for each slot in how many bitmaps it is occupied.
+
+    Args:
+        lows, highs (sequence): The lower and upper halves of many bitmaps.
+
+    Returns:
+        ndarray: The 96 counts, one per quarter hour.
+    """
+    halves = np.array([lows, highs], dtype=np.int64).reshape(2, -1, 1)
+    bits = (halves >> np.arange(HALF_SLOTS, dtype=np.int64)) & 1
+    return np.concatenate([bits[0].sum(axis=0), bits[1].sum(axis=0)])
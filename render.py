@@ -0,0 +1,191 @@
+"""
+Renders the logbook diagrams of many weeks without a display.
+
+Usage:
+    python render.py WOCHEN [WOCHEN ...] [--format png pdf] [--output-dir DIR] [--workers N] [--cache DIR]
+    python render.py WOCHEN [WOCHEN ...] --book MONAT.pdf
+
+WOCHEN is a directory with week JSON files (as written by "In JSON-Datei
+speichern") or a glob pattern such as "archiv/*/KW*.json". The diagrams
+are rendered with the Agg backend in a pool of worker processes.
+
+With --book, all weeks are written as pages of a single PDF instead. The
+weeks are read and drawn one at a time, so memory stays flat no matter
+how many pages the PDF gets.
+
+With --cache, rendered diagrams are kept in a size-bounded cache directory
+and reused for weeks whose content did not change.
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import os
+import time
+
+import matplotlib
+matplotlib.use("Agg")
+from matplotlib.backends.backend_pdf import PdfPages
+
+from logbook import logbook, release_templates
+from rendercache import RenderCache
+from weeklylog import read_week, find_week_files
+
+# The render cache of a worker process, see init_worker
+cache = None
+
+
+def init_worker(cache_dir):
+    """
+    Opens the render cache once per worker process, so the cache directory is
+    scanned once per worker instead of once per file. The workers never evict;
+    render_all enforces the size bound after the batch.
+
+    Args:
+        cache_dir (str): The cache directory, or None to render without cache.
+    """
+    global cache
+    cache = RenderCache(cache_dir, max_bytes=None) if cache_dir else None
+
+
+def render_file(file_path, formats, output_dir=None):
+    """
+    Renders the diagram of one week file. Runs in a worker process, which
+    keeps its cached diagram templates and its render cache between files.
+
+    Args:
+        file_path (str): The week JSON file.
+        formats (list): The output formats, e.g. ['png', 'pdf'].
+        output_dir (str, optional): Where to write the diagrams. Defaults to
+            the directory of the week file.
+
+    Returns:
+        tuple: The file path, the written files, the render time in seconds
+            and an error message (or None).
+    """
+    start_time = time.perf_counter()
+    try:
+        diagram = logbook(read_week(file_path))
+        if not diagram.days_to_plot():
+            return file_path, [], time.perf_counter() - start_time, "keine Aktivitäten"
+
+        base_name = os.path.splitext(os.path.basename(file_path))[0]
+        target_dir = output_dir or os.path.dirname(file_path)
+        written = []
+        for fmt in formats:
+            output_path = os.path.join(target_dir, f"{base_name}.{fmt}")
+            if cache is None:
+                diagram.render().savefig(output_path, format=fmt)
+            else:
+                with open(output_path, 'wb') as f:
+                    f.write(cache.render(diagram.weeklylog, fmt, lambda: diagram.render_bytes(fmt)))
+            written.append(output_path)
+        return file_path, written, time.perf_counter() - start_time, None
+    except (IOError, ValueError) as e:
+        return file_path, [], time.perf_counter() - start_time, str(e)
+
+
+def render_all(files, formats, output_dir=None, workers=None, cache_dir=None):
+    """
+    Renders the diagrams of all files in a process pool and reports the
+    time per file and the overall throughput.
+
+    Args:
+        files (list): The week JSON files.
+        formats (list): The output formats.
+        output_dir (str, optional): Where to write the diagrams.
+        workers (int, optional): The number of worker processes (default: all cores).
+        cache_dir (str, optional): A render cache to reuse unchanged diagrams from.
+
+    Returns:
+        int: The number of files that could not be rendered.
+    """
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    start_time = time.perf_counter()
+    failed = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(cache_dir,)) as executor:
+        futures = [executor.submit(render_file, file_path, formats, output_dir) for file_path in files]
+        for future in futures:
+            file_path, written, seconds, error = future.result()
+            if error:
+                failed += 1
+                print(f"{file_path}: übersprungen ({error})")
+            else:
+                print(f"{file_path}: {seconds:.3f} s -> {', '.join(written)}")
+    if cache_dir:
+        RenderCache(cache_dir).evict()  # The workers only added files
+    elapsed = time.perf_counter() - start_time
+
+    rendered = len(files) - failed
+    throughput = rendered / elapsed if elapsed > 0 else 0.0
+    print(f"{rendered} von {len(files)} Wochen in {elapsed:.2f} s gerendert ({throughput:.1f} Wochen/s)")
+    return failed
+
+
+def iter_weeks(files):
+    """
+    Reads week files lazily, one at a time. Files that cannot be read are reported and skipped.
+
+    Args:
+        files (list): The week JSON files.
+
+    Yields:
+        Week: The next week.
+    """
+    for file_path in files:
+        try:
+            yield read_week(file_path)
+        except (IOError, ValueError) as e:
+            print(f"{file_path}: übersprungen ({e})")
+
+
+def export_book(weeks, output_path):
+    """
+    Streams the diagrams of many weeks into one multi-page PDF.
+
+    Each page is drawn into a cached template and written before the next
+    week is taken from the iterable, so the weeks can come from a generator
+    and the whole archive never has to be in memory at once.
+
+    Args:
+        weeks (iterable): The Week objects, e.g. from iter_weeks.
+        output_path (str): The PDF file to write.
+
+    Returns:
+        int: The number of pages written.
+    """
+    pages = 0
+    try:
+        with PdfPages(output_path) as pdf:
+            for week in weeks:
+                diagram = logbook(week)
+                if not diagram.days_to_plot():
+                    continue
+                pdf.savefig(diagram.render())
+                pages += 1
+    finally:
+        release_templates()
+    return pages
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Wochendiagramme ohne Bildschirm erstellen")
+    parser.add_argument("weeks", nargs="+", help="Verzeichnisse, Dateien oder Glob-Muster mit Wochen-JSON-Dateien")
+    parser.add_argument("--format", nargs="+", choices=["png", "pdf"], default=["png"], dest="formats")
+    parser.add_argument("--output-dir", help="Zielverzeichnis (Standard: neben der JSON-Datei)")
+    parser.add_argument("--workers", type=int, help="Anzahl der Prozesse (Standard: alle Kerne)")
+    parser.add_argument("--cache", help="Verzeichnis für zwischengespeicherte Diagramme")
+    parser.add_argument("--book", help="Alle Wochen als Seiten in diese PDF-Datei schreiben")
+    args = parser.parse_args()
+
+    files = find_week_files(args.weeks)
+    if not files:
+        parser.error("keine Wochen-Dateien gefunden")
+
+    if args.book:
+        start_time = time.perf_counter()
+        pages = export_book(iter_weeks(files), args.book)
+        print(f"{pages} Seiten in {time.perf_counter() - start_time:.2f} s nach {args.book} geschrieben")
+    else:
+        failed = render_all(files, args.formats, args.output_dir, args.workers, args.cache)
+        raise SystemExit(1 if failed else 0)
@@ -0,0 +1,169 @@
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import tempfile
+
+from weeklylog import Week
+
+# Part of every key; increase it when the layout of the diagram changes, so old renders are not reused
+RENDER_VERSION = 1
+
+
+def week_key(week, fmt, dpi=None):
+    """
+    Returns a stable hash of everything that determines the rendered diagram
+    of a week: the normalized data of the days, the metadata (technician, date
+    range, week number), the file format and the resolution.
+
+    Args:
+        week (Week): The week.
+        fmt (str): The format, e.g. 'png' or 'pdf'.
+        dpi (int, optional): The resolution, None for the default of the diagram.
+
+    Returns:
+        str: The hexadecimal SHA-256 hash.
+    """
+    content = json.dumps({'version': RENDER_VERSION, 'format': fmt, 'dpi': dpi,
+                          'week': week.to_dict(include_meta=True)},
+                         sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+class RenderCache:
+    """
+    An on-disk cache of rendered diagrams (PNG or PDF bytes), keyed by the
+    content hash of the week.
+
+    The total size of the cached files is bounded; when it is exceeded, the
+    least recently used files are deleted. The recency is kept in the
+    modification time of the files, so it survives restarts.
+
+    Several processes may share the directory (e.g. the workers of render.py);
+    each writes through its own temporary file. As each process only knows its
+    own writes, they should be created with max_bytes=None and the size bound
+    enforced by one process afterwards with evict().
+    """
+
+    def __init__(self, directory, max_bytes=100 * 1024 * 1024):
+        """
+        Args:
+            directory (str): Where the rendered files are stored.
+            max_bytes (int): The maximum total size of the cached files, or None to never evict.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        # File name -> size, from the least to the most recently used file
+        self.entries = OrderedDict()
+        files = [entry for entry in os.scandir(directory) if entry.is_file() and not entry.name.endswith('.tmp')]
+        for entry in sorted(files, key=lambda entry: entry.stat().st_mtime):
+            self.entries[entry.name] = entry.stat().st_size
+        self.size = sum(self.entries.values())
+
+    def get(self, key, fmt):
+        """
+        Returns the cached bytes of a render and marks them as recently used.
+
+        Args:
+            key (str): The key of the render, see week_key.
+            fmt (str): The format, e.g. 'png' or 'pdf'.
+
+        Returns:
+            bytes: The rendered file, or None on a cache miss.
+        """
+        name = f"{key}.{fmt}"
+        if name in self.entries:
+            path = os.path.join(self.directory, name)
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+                os.utime(path)
+                self.entries.move_to_end(name)
+                self.hits += 1
+                return data
+            except OSError:
+                self.size -= self.entries.pop(name)  # Deleted by someone else
+        self.misses += 1
+        return None
+
+    def put(self, key, fmt, data):
+        """
+        Stores the bytes of a render and evicts the least recently used renders if the cache is too large.
+
+        Args:
+            key (str): The key of the render, see week_key.
+            fmt (str): The format, e.g. 'png' or 'pdf'.
+            data (bytes): The rendered file.
+        """
+        name = f"{key}.{fmt}"
+        with tempfile.NamedTemporaryFile(dir=self.directory, suffix='.tmp', delete=False) as f:
+            f.write(data)
+        os.replace(f.name, os.path.join(self.directory, name))
+        self.size += len(data) - self.entries.pop(name, 0)
+        self.entries[name] = len(data)
+        self.evict()
+
+    def evict(self):
+        """Deletes the least recently used files until the cache fits into max_bytes. The newest file is always kept."""
+        if self.max_bytes is None:
+            return
+        while self.size > self.max_bytes and len(self.entries) > 1:
+            name, size = self.entries.popitem(last=False)
+            self.size -= size
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+    def render(self, week, fmt, render, dpi=None):
+        """
+        Returns the diagram of a week from the cache, or renders and caches it.
+
+        Args:
+            week (Week): The week.
+            fmt (str): The format, e.g. 'png' or 'pdf'.
+            render (callable): Returns the rendered bytes; only called on a cache miss.
+            dpi (int, optional): The resolution the diagram is rendered with.
+
+        Returns:
+            bytes: The rendered file.
+        """
+        key = week_key(week, fmt, dpi)
+        data = self.get(key, fmt)
+        if data is None:
+            data = render()
+            self.put(key, fmt, data)
+        return data
+
+    def stats(self):
+        """
+        Returns:
+            dict: The number of hits and misses, the number of cached files and their total size in bytes.
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'files': len(self.entries), 'bytes': self.size}
+
+
+def warm_up():
+    """Imports the diagram code in a worker process, so its first render does not wait for the import."""
+    import logbook  # noqa: F401
+
+
+def render_week(data, fmt, dpi=None):
+    """
+    Renders the diagram of a week. Meant to run in a worker process, so the
+    week is passed in the JSON format and matplotlib is only imported there.
+
+    Args:
+        data (dict): The week as returned by Week.to_dict(include_meta=True).
+        fmt (str): The file format, e.g. 'png' or 'pdf'.
+        dpi (int, optional): The resolution of raster formats.
+
+    Returns:
+        bytes: The rendered file.
+    """
+    from logbook import logbook
+    return logbook(Week.from_dict(data)).render_bytes(fmt, dpi)
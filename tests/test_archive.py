@@ -0,0 +1,22 @@
+import json
+
+from archive import WeekArchive
+
+
+def test_import_dates_legacy_files_from_their_name(tmp_path):
+    legacy = {"Monday": {"total_hours": 8, "km": 10, "activities": [{"type": "A", "start": 8, "end": 12, "note": ""}]}}
+    for name in ("woche_10.01.2024.json", "2024_KW05.json", "alt.json"):
+        (tmp_path / name).write_text(json.dumps(legacy), encoding='utf-8')
+    files = sorted(str(path) for path in tmp_path.glob("*.json"))
+
+    with WeekArchive(str(tmp_path / "archiv.db")) as archive:
+        assert archive.import_files(files, "Manfred") == 2
+        assert archive.import_files(files, "Manfred") == 2  # Replaced, not added again
+        weeks = archive.find_weeks()
+        assert [(monteur, week_number, date_range) for _, monteur, week_number, date_range in weeks] == [
+            ("Manfred", 2, "08.01.2024 - 14.01.2024"),
+            ("Manfred", 5, "29.01.2024 - 04.02.2024"),
+        ]
+        week = archive.load_week(weeks[0][0])
+        assert week.start_date == "08.01.2024"
+        assert week.days['Monday'].working_minutes() == 240
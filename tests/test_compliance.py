@@ -0,0 +1,77 @@
+import pytest
+
+from compliance import check_day, BREAK_TOO_SHORT, WORK_TOO_LONG, OVERLAP, NEGATIVE, GAP
+from weeklylog import Activity, Day
+
+
+def day_of(*activities):
+    """Builds a day from (type, start, end) tuples with the times in hours."""
+    return Day(activities=[Activity(activity_type, start, end) for activity_type, start, end in activities])
+
+
+def kinds(day):
+    return [finding.kind for finding in check_day(day)]
+
+
+def test_day_with_break_is_compliant():
+    assert kinds(day_of(('A', 8, 12), ('P', 12, 12.5), ('A', 12.5, 16))) == []
+
+
+def test_short_break_after_six_hours():
+    assert kinds(day_of(('A', 8, 12), ('P', 12, 12.25), ('A', 12.25, 15))) == [BREAK_TOO_SHORT]
+
+
+def test_six_hours_in_a_row_are_allowed():
+    assert kinds(day_of(('A', 8, 14))) == []
+
+
+def test_work_too_long_without_break():
+    findings = check_day(day_of(('A', 6, 10), ('P', 10, 10.5), ('F', 10.5, 14), ('A', 14, 17.5)))
+    assert [finding.kind for finding in findings] == [WORK_TOO_LONG]
+    assert (findings[0].start, findings[0].end) == (16.5 * 60, 17.5 * 60)
+
+
+def test_break_below_the_minimum_block_does_not_reset():
+    # Two 10 minute breaks add up to the 20 minutes, but neither interrupts the stretch
+    assert kinds(day_of(('A', 8, 11), ('P', 11, 11 + 1 / 6), ('A', 11 + 1 / 6, 13),
+                        ('P', 13, 13 + 1 / 6), ('A', 13 + 1 / 6, 15.5))) == [BREAK_TOO_SHORT, WORK_TOO_LONG]
+
+
+def test_break_inside_a_work_block_does_not_count():
+    # The break is covered by the first work block, so 08-15 is 7 hours of work in a row
+    assert kinds(day_of(('A', 8, 13), ('P', 12, 12.5), ('A', 13, 15))) == [BREAK_TOO_SHORT, OVERLAP, WORK_TOO_LONG]
+
+
+def test_partly_covered_break_counts_its_uncovered_part():
+    # 15 of the 30 minutes of break are not covered: they interrupt the work, but are too short in total
+    assert kinds(day_of(('A', 8, 12.25), ('P', 12, 12.5), ('A', 12.5, 15))) == [BREAK_TOO_SHORT, OVERLAP]
+    assert kinds(day_of(('A', 8, 12.25), ('P', 12, 13), ('A', 13, 15))) == [OVERLAP]
+
+
+def test_gap_counts_as_break():
+    assert kinds(day_of(('A', 8, 12), ('A', 12.5, 16))) == [GAP]
+
+
+def test_short_gap_is_not_a_break():
+    assert kinds(day_of(('A', 8, 12), ('A', 12 + 1 / 6, 16))) == [BREAK_TOO_SHORT, GAP, WORK_TOO_LONG]
+
+
+def test_overlap_is_counted_once():
+    findings = check_day(day_of(('A', 8, 11), ('F', 10, 14)))
+    assert [finding.kind for finding in findings] == [OVERLAP]
+    assert (findings[0].start, findings[0].end) == (10 * 60, 11 * 60)
+
+
+def test_negative_time():
+    findings = check_day(day_of(('A', 12, 8), ('A', 13, 14)))
+    assert [finding.kind for finding in findings] == [NEGATIVE]
+    assert findings[0].is_violation()
+
+
+@pytest.mark.parametrize("activities", [(), (('A', None, 12),)])
+def test_empty_and_incomplete_days(activities):
+    assert kinds(day_of(*activities)) == []
+
+
+def test_gap_is_only_a_notice():
+    assert not check_day(day_of(('A', 8, 9), ('A', 10, 11)))[0].is_violation()
@@ -0,0 +1,69 @@
+from undolog import UndoLog, activity_values
+from weeklylog import Week, Activity
+
+
+def edit_end(log, week, activity, end_minute):
+    """Edits the end time of an activity on Monday and records the change like the GUI does."""
+    old_values = activity_values(activity)
+    week.days['Monday'].update_activity_minutes(activity, activity.type, activity.start_minute, end_minute, activity.note)
+    log.record(('edit', 'Monday', activity, old_values, activity_values(activity)))
+
+
+def test_key_strokes_are_merged_until_sealed():
+    week = Week()
+    activity = Activity('F', 7, 8)
+    week.days['Monday'].add_activity(activity)
+    log = UndoLog()
+    for end_minute in (490, 500, 510):
+        edit_end(log, week, activity, end_minute)
+    log.seal()
+    edit_end(log, week, activity, 520)
+
+    assert len(log.undo_changes) == 2
+    log.undo(week)
+    assert activity.end_minute == 510
+    log.undo(week)
+    assert activity.end_minute == 480
+    assert week.days['Monday'].subtotal == 60
+
+
+def test_edit_back_to_old_value_does_not_merge_into_previous_change():
+    week = Week()
+    activity = Activity('F', 7, 8)
+    week.days['Monday'].add_activity(activity)
+    log = UndoLog()
+    edit_end(log, week, activity, 500)
+    log.seal()
+    edit_end(log, week, activity, 510)
+    edit_end(log, week, activity, 500)  # Edited back: the merged change is a no-op and dropped
+    edit_end(log, week, activity, 520)
+
+    assert len(log.undo_changes) == 2
+    log.undo(week)
+    assert activity.end_minute == 500
+    log.undo(week)
+    assert activity.end_minute == 480
+
+
+def test_undo_and_redo_of_delete_and_clear_restore_the_order():
+    week = Week("01.01.2024 - 07.01.2024", "Monteur", 1, "01.01.2024")
+    day = week.days['Monday']
+    activities = [Activity('F', hour, hour + 1, str(hour)) for hour in range(6, 10)]
+    for activity in activities:
+        day.add_activity(activity)
+    before = week.to_dict(include_meta=True)
+    log = UndoLog()
+
+    log.record(('delete', 'Monday', day.remove_activity(activities[1].id), 1))
+    log.record(('clear', None, (week.monteur, week.start_date, week.date_range, week.week_number), {
+        day_en: (day.total_hours, day.km, tuple(day.activities.values())) for day_en, day in week.days.items()
+    }))
+    week.clear()
+
+    log.undo(week)
+    log.undo(week)
+    assert week.to_dict(include_meta=True) == before
+    assert day.subtotal == 240
+    log.redo(week)
+    assert [activity.note for activity in day.activities.values()] == ['6', '8', '9']
+    assert log.undo(week) is not None and log.undo(week) is None
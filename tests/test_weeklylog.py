@@ -0,0 +1,81 @@
+import datetime
+import json
+
+import pytest
+
+from weeklylog import Week, parse_time, format_minutes, read_week, start_date_of
+
+
+@pytest.mark.parametrize("value, minutes", [
+    ("7", 420),
+    ("10", 600),
+    ("7.5", 450),
+    ("7,5", 450),
+    (".5", 30),
+    ("07:30", 450),
+    ("7:30", 450),
+    ("730", 450),
+    ("0730", 450),
+    ("100", 60),
+    ("1000", 600),
+    ("24:00", 1440),
+    ("0", 0),
+    (" 08:15 ", 495),
+    (7.25, 435),
+    (24, 1440),
+])
+def test_parse_time_accepts(value, minutes):
+    assert parse_time(value) == minutes
+
+
+@pytest.mark.parametrize("value", [
+    "-1", "-0:30", "25:00", "24:30", "12345", "1e3", "+7", "7:60", "2500", "7:5",
+    "abc", "", None, "inf", "nan", -1, 25, float('inf'), float('nan'),
+])
+def test_parse_time_rejects(value):
+    assert parse_time(value) is None
+
+
+def test_format_minutes_round_trips_through_parse_time():
+    for minutes in range(0, 24 * 60 + 1, 7):
+        assert parse_time(format_minutes(minutes)) == minutes
+
+
+@pytest.mark.parametrize("data", [
+    [{"monteur": "A", "jahr": 2025}],
+    "Woche",
+    {"meta": []},
+    {"Monday": []},
+    {"Monday": {"activities": {}}},
+    {"Monday": {"activities": ["A 08-12"]}},
+])
+def test_read_week_rejects_other_json(tmp_path, data):
+    file_path = tmp_path / "other.json"
+    file_path.write_text(json.dumps(data), encoding='utf-8')
+    with pytest.raises(ValueError):
+        read_week(str(file_path))
+
+
+def test_read_week_reads_a_week_without_meta(tmp_path):
+    file_path = tmp_path / "week.json"
+    file_path.write_text(json.dumps({"Monday": {"total_hours": 8, "km": 12.5, "activities": [
+        {"type": "A", "start": 8, "end": 12, "note": ""}]}}), encoding='utf-8')
+    week = read_week(str(file_path))
+    assert week.start_date == ""
+    assert week.days["Monday"].km == 12.5
+    assert week.days["Monday"].working_minutes() == 240
+
+
+@pytest.mark.parametrize("start_date, file_name, monday", [
+    ("08.01.2024", "woche_01.02.2024.json", datetime.date(2024, 1, 8)),
+    ("", "woche_10.01.2024.json", datetime.date(2024, 1, 8)),
+    ("", "2024-01-10.json", datetime.date(2024, 1, 8)),
+    ("", "2024_KW05.json", datetime.date(2024, 1, 29)),
+])
+def test_start_date_of(start_date, file_name, monday):
+    assert start_date_of(Week(start_date=start_date), file_name) == monday
+
+
+def test_start_date_of_rejects_files_without_a_date():
+    with pytest.raises(ValueError):
+        start_date_of(Week(), "alt.json")
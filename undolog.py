@@ -0,0 +1,148 @@
+from collections import deque
+
+from weeklylog import DAYS_OF_WEEK
+
+
+def meta_values(week):
+    """Returns the metadata of a week as a tuple, in the order used by 'meta' changes."""
+    return (week.monteur, week.start_date, week.date_range, week.week_number)
+
+
+def activity_values(activity):
+    """Returns the fields of an activity as a tuple, in the order used by 'edit' changes."""
+    return (activity.type, activity.start_minute, activity.end_minute, activity.note)
+
+
+class UndoLog:
+    """
+    Undo and redo of the edits of a week, as a log of small changes.
+
+    A change is a tuple that only holds what was changed; the activities are
+    referenced, not copied, so the log grows with the size of the edits and
+    not with the size of the week:
+        ('insert', day, activity, position)  - an activity was added
+        ('delete', day, activity, position)  - an activity was removed
+        ('edit', day, activity, old, new)    - the fields of an activity, see activity_values
+        ('day', day, old, new)               - the total hours and km of a day
+        ('meta', None, old, new)             - the metadata, see meta_values
+        ('clear', None, old_meta, old_days)  - all data was deleted; old_days maps each
+                                               day to its total hours, km and activities
+
+    Each change is undone and redone as a whole; a bulk operation such as
+    'clear' is a single change. Repeated edits of the same field (one per key
+    stroke) are merged into one change until the log is sealed.
+    """
+
+    def __init__(self, limit=1000):
+        """
+        Args:
+            limit (int): The maximum number of changes that can be undone.
+        """
+        self.undo_changes = deque(maxlen=limit)
+        self.redo_changes = []
+        self.sealed = True  # Whether the next change is recorded separately
+
+    def clear(self):
+        """Forgets all changes, e.g. after another week was loaded."""
+        self.undo_changes.clear()
+        self.redo_changes.clear()
+        self.sealed = True
+
+    def seal(self):
+        """Ends merging: the next edit of the same field is undone separately."""
+        self.sealed = True
+
+    def record(self, change):
+        """
+        Records a change that was just made to the week.
+
+        Args:
+            change (tuple): The change, see the class docstring.
+        """
+        op = change[0]
+        self.redo_changes.clear()  # A new edit cannot be followed by a redo
+        if not self.sealed and op in ('edit', 'day', 'meta') and self.undo_changes:
+            last = self.undo_changes[-1]
+            target = 3 if op == 'edit' else 2  # The op, the day and the edited activity, if any
+            if last[:target] == change[:target]:
+                # Keep the oldest value of the merged edits
+                self.undo_changes.pop()
+                merged = change[:-2] + (last[-2], change[-1])
+                if merged[-2] != merged[-1]:
+                    self.undo_changes.append(merged)
+                else:
+                    self.sealed = True  # Edited back; do not merge into the change before it
+                return
+        self.undo_changes.append(change)
+        self.sealed = op not in ('edit', 'day', 'meta')
+
+    def undo(self, week):
+        """
+        Reverts the last change.
+
+        Args:
+            week (Week): The week the change was made to.
+
+        Returns:
+            tuple: The reverted change, or None if there is nothing to undo.
+        """
+        if not self.undo_changes:
+            return None
+        change = self.undo_changes.pop()
+        apply_change(week, change, undo=True)
+        self.redo_changes.append(change)
+        self.sealed = True
+        return change
+
+    def redo(self, week):
+        """
+        Applies the last undone change again.
+
+        Args:
+            week (Week): The week the change was made to.
+
+        Returns:
+            tuple: The applied change, or None if there is nothing to redo.
+        """
+        if not self.redo_changes:
+            return None
+        change = self.redo_changes.pop()
+        apply_change(week, change, undo=False)
+        self.undo_changes.append(change)
+        self.sealed = True
+        return change
+
+
+def apply_change(week, change, undo):
+    """
+    Applies a change to a week, or reverts it. The subtotals of the days are
+    updated by delta, as for any other edit.
+
+    Args:
+        week (Week): The week.
+        change (tuple): The change, see UndoLog.
+        undo (bool): Revert the change instead of applying it.
+    """
+    op, day_en = change[0], change[1]
+    if op == 'meta':
+        week.monteur, week.start_date, week.date_range, week.week_number = change[2] if undo else change[3]
+    elif op == 'clear':
+        if undo:
+            week.monteur, week.start_date, week.date_range, week.week_number = change[2]
+            for day_en in DAYS_OF_WEEK:
+                day = week.days[day_en]
+                day.total_hours, day.km, activities = change[3][day_en]
+                for activity in activities:
+                    day.add_activity(activity)
+        else:
+            week.clear()
+    else:
+        day = week.days[day_en]
+        if op == 'day':
+            day.total_hours, day.km = change[2] if undo else change[3]
+        elif op == 'edit':
+            day.update_activity_minutes(change[2], *(change[3] if undo else change[4]))
+        elif (op == 'insert') == undo:
+            day.remove_activity(change[2].id)
+        else:
+            day.insert_activity(change[2], change[3])
@@ -0,0 +1,154 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import datetime
+import os
+import threading
+
+from weeklylog import Week
+
+
+def week_of(monteur, start_date):
+    """
+    Returns an empty week of a technician starting on a Monday, with the date
+    range and calendar week filled in like update_week_info_from_date does.
+
+    Args:
+        monteur (str): The technician.
+        start_date (date): The Monday of the week.
+    """
+    end_date = start_date + datetime.timedelta(days=6)
+    return Week(f"{start_date.strftime('%d.%m.%Y')} - {end_date.strftime('%d.%m.%Y')}", monteur,
+                start_date.isocalendar()[1], start_date.strftime('%d.%m.%Y'))
+
+
+class WeekCache:
+    """
+    A bounded LRU cache of parsed weeks, keyed by technician and start date,
+    that loads weeks from the archive in a background thread.
+
+    Weeks that are not in the archive are cached as None, so they are only
+    looked up once. The week shown in the app is taken out of the cache while
+    it is edited and put back when another week is shown, so a cached week is
+    never changed behind the cache's back.
+    """
+
+    def __init__(self, archive_path, capacity=8):
+        """
+        Args:
+            archive_path (str): The SQLite archive to load the weeks from.
+            capacity (int): The maximum number of cached weeks.
+        """
+        self.archive_path = archive_path
+        self.capacity = capacity
+        self.weeks = OrderedDict()  # (technician, start date) -> Week or None, least recently used first
+        self.pending = {}  # (technician, start date) -> Future of a running load
+        self.lock = threading.Lock()
+        self.loader = ThreadPoolExecutor(max_workers=1)
+        self.hits = 0
+        self.misses = 0
+
+    def close(self):
+        """Stops the background loader; queued loads are dropped."""
+        self.loader.shutdown(wait=False, cancel_futures=True)
+
+    def load(self, monteur, start_date):
+        """
+        Reads a week from the archive. Runs in the loader thread, so it uses its own connection.
+
+        Returns:
+            Week: The archived week, or None if it is not archived.
+        """
+        from archive import WeekArchive
+
+        if not os.path.exists(self.archive_path):
+            return None  # Nothing archived yet; do not create an empty archive
+        with WeekArchive(self.archive_path) as archive:
+            weeks = archive.find_weeks(monteur, date_from=start_date, date_to=start_date)
+            return archive.load_week(weeks[0][0]) if weeks else None
+
+    def store(self, key, week):
+        """Caches a week as the most recently used one and evicts the least recently used weeks."""
+        with self.lock:
+            self.weeks[key] = week
+            self.weeks.move_to_end(key)
+            while len(self.weeks) > self.capacity:
+                self.weeks.popitem(last=False)
+
+    def put(self, week):
+        """
+        Caches a week that is no longer shown. Weeks without a valid start date are ignored.
+
+        Args:
+            week (Week): The week.
+        """
+        try:
+            start_date = datetime.datetime.strptime(week.start_date, "%d.%m.%Y").date()
+        except ValueError:
+            return
+        self.store((week.monteur, start_date), week)
+
+    def forget(self, week):
+        """
+        Drops the cached copy of a week, e.g. because the week was saved in the
+        archive from elsewhere. A running background load of it is ignored.
+
+        Args:
+            week (Week): The week.
+        """
+        try:
+            start_date = datetime.datetime.strptime(week.start_date, "%d.%m.%Y").date()
+        except ValueError:
+            return
+        with self.lock:
+            self.weeks.pop((week.monteur, start_date), None)
+            self.pending.pop((week.monteur, start_date), None)
+
+    def prefetch(self, monteur, start_date):
+        """
+        Loads a week in the background, unless it is cached or already being loaded.
+
+        Args:
+            monteur (str): The technician.
+            start_date (date): The Monday of the week.
+        """
+        key = (monteur, start_date)
+        with self.lock:
+            if key in self.weeks or key in self.pending:
+                return
+            future = self.loader.submit(self.load, monteur, start_date)
+            self.pending[key] = future
+        future.add_done_callback(lambda future: self.on_loaded(key, future))
+
+    def on_loaded(self, key, future):
+        """Caches the result of a background load. Runs in the loader thread."""
+        with self.lock:
+            if self.pending.get(key) is not future:
+                return  # Taken meanwhile
+            del self.pending[key]
+        if not future.cancelled() and future.exception() is None:
+            self.store(key, future.result())
+
+    def take(self, monteur, start_date):
+        """
+        Removes a week from the cache and returns it. Waits for a running
+        background load of the week, and loads the week right away if it was
+        not prefetched.
+
+        Args:
+            monteur (str): The technician.
+            start_date (date): The Monday of the week.
+
+        Returns:
+            Week: The week; a new empty week if it is not archived.
+        """
+        key = (monteur, start_date)
+        with self.lock:
+            cached = key in self.weeks
+            week = self.weeks.pop(key, None)
+            future = self.pending.pop(key, None)
+        if cached:
+            self.hits += 1
+        else:
+            self.misses += 1
+            week = future.result() if future is not None else self.load(monteur, start_date)
+        return week if week is not None else week_of(monteur, start_date)
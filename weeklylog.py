@@ -1,10 +1,397 @@
+import datetime
+import glob
+import itertools
+import json
+import os
+import re
 
+DAYS_OF_WEEK = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+DAYS_OF_WEEK_DE = ['Montag', 'Dienstag', 'Mittwoch', 'Donnerstag', 'Freitag', 'Samstag', 'Sonntag']
+ACTIVITY_TYPES = ['F', 'A', 'P']
+BREAK_TYPE = 'P'
+# Integer codes of the activity types, also used as their y positions in the diagram
+TYPE_CODES = {'A': 2, 'F': 1, 'P': 0}
+# Times are minutes since midnight, from 00:00 to 24:00 (the end of the day)
+MINUTES_PER_DAY = 24 * 60
+# "HH:MM", or "HHMM" with three or four digits
+CLOCK_TIME = re.compile(r"(\d{1,2}):(\d{2})|(\d{1,2})(\d{2})")
+# Hours with one or two digits and an optional fraction, e.g. "7", "10", "7.5", ".5"
+DECIMAL_HOURS = re.compile(r"\d{1,2}(\.\d*)?|\.\d+")
+# Dates and ISO weeks in file names, for files without a start date
+NAME_DATE = re.compile(r"(\d{2})\.(\d{2})\.(\d{4})|(\d{4})-(\d{2})-(\d{2})")
+NAME_WEEK = re.compile(r"(\d{4})[-_ ]?KW[-_ ]?(\d{1,2})", re.IGNORECASE)
 
-class weeklylog:
-    def __init__(self, date_range, monteur, week_number):
+# Source of the ids that key activities within a day
+activity_ids = itertools.count(1)
 
+
+def parse_number(value, default=None):
+    """
+    Converts a user-entered value into a float.
+
+    Args:
+        value: The raw value (usually the text of an entry widget).
+        default: Returned if the value is not a valid number.
+
+    Returns:
+        float: The parsed number, or the default for invalid input.
+    """
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def parse_time(value):
+    """
+    Converts a time of day into minutes since midnight.
+
+    Accepts hours as a number or text ("7.5" or "7,5"), "HH:MM" ("07:30")
+    and "HHMM" without separator ("730", "0730"). Digits alone are read by
+    their count: one or two digits are whole hours ("7", "10"), three or four
+    digits are HHMM ("100" is 01:00, "1000" is 10:00). Signs, exponents and
+    times outside 00:00 to 24:00 are invalid.
+
+    Args:
+        value: The raw value (the text of an entry widget or a number from JSON).
+
+    Returns:
+        int: The minutes, or None for invalid input.
+    """
+    try:
+        if isinstance(value, (int, float)):
+            minutes = round(value * 60)
+        else:
+            text = str(value).strip().replace(',', '.') if value is not None else ''
+            match = CLOCK_TIME.fullmatch(text)
+            if match:
+                hours, minutes = (int(group) for group in (match.group(1, 2) if match.group(1) else match.group(3, 4)))
+                if minutes >= 60:
+                    return None
+                minutes += hours * 60
+            elif DECIMAL_HOURS.fullmatch(text):
+                minutes = round(float(text) * 60)
+            else:
+                return None
+    except (ValueError, OverflowError):
+        return None
+    return minutes if 0 <= minutes <= MINUTES_PER_DAY else None
+
+
+def format_minutes(minutes):
+    """Formats minutes since midnight as 'HH:MM', or '' for None."""
+    return '' if minutes is None else f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+class Activity:
+    """
+    A single activity of a day with pre-parsed start and end times.
+
+    The times are stored as integer minutes since midnight, so that totals are
+    exact integer sums. The properties `start` and `end` give them in hours,
+    as in the JSON format and the diagram.
+
+    Invalid or missing times are stored as None so that the activity can be
+    kept in the model while the user is still typing. Every activity gets a
+    unique id, which keys it within its day and in the GUI.
+    """
+
+    __slots__ = ('id', 'type', 'start_minute', 'end_minute', 'note')
+
+    def __init__(self, type=ACTIVITY_TYPES[0], start=None, end=None, note=''):
+        """
+        Args:
+            type (str): The activity type.
+            start, end (float): The times in hours, or None.
+            note (str): The note.
+        """
+        self.id = next(activity_ids)
+        self.type = type
+        self.start = start
+        self.end = end
+        self.note = note
+
+    @property
+    def start(self):
+        return None if self.start_minute is None else self.start_minute / 60
+
+    @start.setter
+    def start(self, hours):
+        self.start_minute = None if hours is None else round(hours * 60)
+
+    @property
+    def end(self):
+        return None if self.end_minute is None else self.end_minute / 60
+
+    @end.setter
+    def end(self, hours):
+        self.end_minute = None if hours is None else round(hours * 60)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Creates an activity from a dictionary in the JSON format."""
+        activity = cls(data.get('type', ACTIVITY_TYPES[0]), note=data.get('note', ''))
+        activity.start_minute = parse_time(data.get('start'))
+        activity.end_minute = parse_time(data.get('end'))
+        return activity
+
+    def is_valid(self):
+        """Returns True if both start and end time are set."""
+        return self.start_minute is not None and self.end_minute is not None
+
+    def working_minutes(self):
+        """Returns the working minutes of this activity, excluding breaks ('P')."""
+        if self.type == BREAK_TYPE or not self.is_valid():
+            return 0
+        duration = self.end_minute - self.start_minute
+        return duration if duration > 0 else 0
+
+    def working_hours(self):
+        """Returns the working hours of this activity, excluding breaks ('P')."""
+        return self.working_minutes() / 60
+
+    def to_dict(self):
+        return {
+            'type': self.type,
+            'start': self.start,
+            'end': self.end,
+            'note': self.note
+        }
+
+
+class Day:
+    """
+    The log of a single day: total hours, kilometers and the activities,
+    keyed by id in insertion order.
+
+    The working minutes of the day are cached in `subtotal` and updated by delta
+    whenever an activity is added, removed or edited through the methods below,
+    so a single edit costs O(1) instead of a rescan of all activities. As the
+    minutes are integers, the subtotal is exact.
+    """
+
+    __slots__ = ('total_hours', 'km', 'activities', 'subtotal')
+
+    def __init__(self, total_hours=0.0, km=0.0, activities=None):
+        self.total_hours = total_hours
+        self.km = km
+        self.activities = {activity.id: activity for activity in activities or []}
+        self.subtotal = sum(activity.working_minutes() for activity in self.activities.values())
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Creates a day from a dictionary in the JSON format.
+
+        Raises:
+            ValueError: If the data does not have the shape of a day.
+        """
+        activities = data.get('activities', []) if isinstance(data, dict) else None
+        if not isinstance(activities, list) or not all(isinstance(activity, dict) for activity in activities):
+            raise ValueError("kein gültiger Tag")
+        return cls(
+            parse_number(data.get('total_hours'), 0.0),
+            parse_number(data.get('km'), 0.0),
+            [Activity.from_dict(activity) for activity in activities]
+        )
+
+    def add_activity(self, activity):
+        """Appends an activity and adds its working minutes to the subtotal."""
+        self.activities[activity.id] = activity
+        self.subtotal += activity.working_minutes()
+
+    def insert_activity(self, activity, position):
+        """Inserts an activity at a position of the order and adds its working minutes to the subtotal."""
+        if position >= len(self.activities):
+            self.add_activity(activity)
+            return
+        activities = list(self.activities.values())
+        activities.insert(position, activity)
+        self.activities.clear()
+        self.activities.update((a.id, a) for a in activities)
+        self.subtotal += activity.working_minutes()
+
+    def remove_activity(self, activity_id):
+        """Removes an activity by id and subtracts its working minutes from the subtotal."""
+        activity = self.activities.pop(activity_id)
+        self.subtotal -= activity.working_minutes()
+        return activity
+
+    def clear(self):
+        """Removes all activities and resets the totals."""
+        self.total_hours = 0.0
+        self.km = 0.0
+        self.activities.clear()
+        self.subtotal = 0
+
+    def update_activity(self, activity, type, start, end, note):
+        """Updates the fields of an activity (times in hours) and applies the change to the subtotal."""
+        self.update_activity_minutes(activity, type,
+                                     None if start is None else round(start * 60),
+                                     None if end is None else round(end * 60), note)
+
+    def update_activity_minutes(self, activity, type, start_minute, end_minute, note):
+        """Updates the fields of an activity (times in minutes) and applies the change to the subtotal."""
+        old_minutes = activity.working_minutes()
+        activity.type = type
+        activity.start_minute = start_minute
+        activity.end_minute = end_minute
+        activity.note = note
+        self.subtotal += activity.working_minutes() - old_minutes
+
+    def working_minutes(self):
+        """Returns the cached working minutes of the day, excluding breaks ('P')."""
+        return self.subtotal
+
+    def working_hours(self):
+        """Returns the working hours of the day, excluding breaks ('P')."""
+        return self.subtotal / 60
+
+    def to_dict(self):
+        """Returns the day as a dictionary, skipping activities with invalid times."""
+        return {
+            'total_hours': self.total_hours,
+            'km': self.km,
+            'activities': [activity.to_dict() for activity in self.activities.values() if activity.is_valid()]
+        }
+
+
+class Week:
+    """
+    Headless data model of a weekly log.
+
+    Holds the metadata of the week and one Day per weekday. The GUI is bound to
+    this model, but it can be used on its own (e.g. in batch jobs).
+
+    In JSON, the metadata is stored in an optional 'meta' object next to the
+    days, which older versions of the application simply ignore.
+    """
+
+    __slots__ = ('date_range', 'monteur', 'week_number', 'start_date', 'days')
+
+    def __init__(self, date_range="", monteur="", week_number="", start_date=""):
         self.date_range = date_range
         self.monteur = monteur
         self.week_number = week_number
+        self.start_date = start_date  # The Monday of the week as 'TT.MM.JJJJ'
+        self.days = {day_en: Day() for day_en in DAYS_OF_WEEK}
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Creates a week from a dictionary in the format written by save_to_json.
+
+        Raises:
+            ValueError: If the data does not have the shape of a week, e.g. a
+                JSON file written by another tool.
+        """
+        meta = data.get('meta', {}) if isinstance(data, dict) else None
+        if not isinstance(meta, dict):
+            raise ValueError("keine gültige Woche")
+        week = cls(
+            meta.get('date_range', ""),
+            meta.get('monteur', ""),
+            meta.get('week_number', ""),
+            meta.get('start_date', "")
+        )
+        for day_en in DAYS_OF_WEEK:
+            if day_en in data:
+                week.days[day_en] = Day.from_dict(data[day_en])
+        return week
+
+    def clear(self):
+        """Resets the metadata and clears all days in place."""
+        self.date_range = ""
+        self.monteur = ""
+        self.week_number = ""
+        self.start_date = ""
+        for day in self.days.values():
+            day.clear()
+
+    def working_hours(self):
+        """Returns the total working hours of the week, summed exactly from the cached day subtotals in minutes."""
+        return sum(day.working_minutes() for day in self.days.values()) / 60
+
+    def to_dict(self, include_meta=False):
+        """
+        Returns the week in the format written by save_to_json.
+
+        Args:
+            include_meta (bool): Also include the 'meta' object with the technician
+                and the date information of the week.
+        """
+        data = {day_en: day.to_dict() for day_en, day in self.days.items()}
+        if include_meta:
+            data['meta'] = {
+                'monteur': self.monteur,
+                'start_date': self.start_date,
+                'date_range': self.date_range,
+                'week_number': self.week_number
+            }
+        return data
+
+
+def read_week(file_path):
+    """
+    Reads a week from a JSON file in the format written by save_to_json.
+
+    Args:
+        file_path (str): The path of the JSON file.
+
+    Returns:
+        Week: The loaded week.
+
+    Raises:
+        ValueError: If the file is not valid JSON or not a week.
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return Week.from_dict(json.load(f))
+
+
+def find_week_files(patterns):
+    """
+    Expands directories and glob patterns into a sorted list of JSON files.
+
+    Args:
+        patterns (list): Directories, file names or glob patterns.
+
+    Returns:
+        list: The paths of the week files.
+    """
+    files = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            files.update(glob.glob(os.path.join(pattern, "*.json")))
+        else:
+            files.update(glob.glob(pattern))
+    return sorted(files)
+
+
+def start_date_of(week, file_path):
+    """
+    Returns the Monday of a week: its start date, or else the date or ISO week in the file name.
+
+    Args:
+        week (Week): The week read from the file.
+        file_path (str): The week JSON file.
+
+    Returns:
+        date: The Monday of the week.
 
-        
\ No newline at end of file
+    Raises:
+        ValueError: If neither the week nor the file name gives a date.
+    """
+    try:
+        return datetime.datetime.strptime(week.start_date, "%d.%m.%Y").date()
+    except ValueError:
+        pass
+    name = os.path.basename(file_path)
+    match = NAME_DATE.search(name)
+    if match:
+        day, month, year = match.group(1, 2, 3) if match.group(1) else reversed(match.group(4, 5, 6))
+        date = datetime.date(int(year), int(month), int(day))
+        return date - datetime.timedelta(days=date.weekday())
+    match = NAME_WEEK.search(name)
+    if match:
+        return datetime.date.fromisocalendar(int(match.group(1)), int(match.group(2)), 1)
+    raise ValueError("kein Startdatum in der Datei oder im Dateinamen")
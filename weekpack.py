@@ -0,0 +1,248 @@
+"""
+A compact binary container for many weeks.
+
+Usage:
+    python weekpack.py pack PAKET.ddlw WOCHEN [WOCHEN ...]
+    python weekpack.py list PAKET.ddlw
+    python weekpack.py unpack PAKET.ddlw NR DATEI.json
+
+WOCHEN is a directory with week JSON files (as written by "In JSON-Datei
+speichern") or a glob pattern.
+
+Layout (little endian):
+    file header     magic, version, number of weeks, offset of the index
+    week blocks     one per week, see below
+    index           one fixed-width entry per week (offset and length of its
+                    block, start date, technician), then the technician names
+
+    week block      header with total hours, km and activity counts per day,
+                    then fixed-width activity records (start and end in
+                    integer minutes, type code, note offset and length),
+                    then the string table (metadata as JSON, then the notes)
+
+The index is read on opening; a single week is then unpacked straight from
+the memory-mapped file without reading any other week.
+"""
+import argparse
+import datetime
+import json
+import mmap
+import struct
+
+from weeklylog import Week, Day, Activity, ACTIVITY_TYPES, DAYS_OF_WEEK, read_week, find_week_files
+
+MAGIC = b'DDLW'
+VERSION = 1
+FILE_HEADER = struct.Struct('<4sHIQ')  # Magic, version, number of weeks, index offset
+INDEX_ENTRY = struct.Struct('<QIiII')  # Block offset and length, start date ordinal (0 if none), technician offset and length
+WEEK_HEADER = struct.Struct('<7d7d7HII')  # Total hours, km and activity count per day, metadata length, string table length
+ACTIVITY_RECORD = struct.Struct('<iiBII')  # Start and end minute, type code, note offset and length
+
+
+def pack_week(week):
+    """
+    Encodes a week as one block. Like the JSON format, activities with invalid times are left out.
+
+    Args:
+        week (Week): The week.
+
+    Returns:
+        bytes: The block.
+    """
+    types = list(ACTIVITY_TYPES)
+    records = []
+    counts = []
+    notes = []
+    notes_length = 0
+    for day_en in DAYS_OF_WEEK:
+        activities = [activity for activity in week.days[day_en].activities.values() if activity.is_valid()]
+        counts.append(len(activities))
+        for activity in activities:
+            if activity.type not in types:
+                types.append(activity.type)
+            note = activity.note.encode('utf-8')
+            records.append(ACTIVITY_RECORD.pack(activity.start_minute, activity.end_minute,
+                                                types.index(activity.type), notes_length, len(note)))
+            notes.append(note)
+            notes_length += len(note)
+
+    meta = {'monteur': week.monteur, 'start_date': week.start_date,
+            'date_range': week.date_range, 'week_number': week.week_number}
+    if types != ACTIVITY_TYPES:
+        meta['types'] = types  # Type codes beyond the known types
+    meta = json.dumps(meta, ensure_ascii=False).encode('utf-8')
+
+    days = [week.days[day_en] for day_en in DAYS_OF_WEEK]
+    header = WEEK_HEADER.pack(*[day.total_hours for day in days], *[day.km for day in days], *counts,
+                              len(meta), len(meta) + notes_length)
+    return b''.join([header] + records + [meta] + notes)
+
+
+def unpack_week(buffer, offset=0):
+    """
+    Decodes the block of a week.
+
+    Args:
+        buffer: The bytes, memory map or memoryview holding the block.
+        offset (int): The position of the block in the buffer.
+
+    Returns:
+        Week: The decoded week.
+    """
+    values = WEEK_HEADER.unpack_from(buffer, offset)
+    total_hours, km, counts = values[0:7], values[7:14], values[14:21]
+    meta_length = values[21]
+    records_offset = offset + WEEK_HEADER.size
+    strings_offset = records_offset + sum(counts) * ACTIVITY_RECORD.size
+    notes_offset = strings_offset + meta_length
+
+    meta = json.loads(bytes(buffer[strings_offset:notes_offset]).decode('utf-8'))
+    types = meta.pop('types', ACTIVITY_TYPES)
+    week = Week(meta['date_range'], meta['monteur'], meta['week_number'], meta['start_date'])
+
+    records = ACTIVITY_RECORD.iter_unpack(buffer[records_offset:strings_offset])
+    for day_en, day_hours, day_km, count in zip(DAYS_OF_WEEK, total_hours, km, counts):
+        activities = []
+        for _ in range(count):
+            start_minute, end_minute, type_code, note_offset, note_length = next(records)
+            activity = Activity(types[type_code], note=bytes(
+                buffer[notes_offset + note_offset:notes_offset + note_offset + note_length]).decode('utf-8'))
+            activity.start_minute = start_minute
+            activity.end_minute = end_minute
+            activities.append(activity)
+        week.days[day_en] = Day(day_hours, day_km, activities)
+    return week
+
+
+def write_pack(path, weeks):
+    """
+    Writes many weeks into one container. The weeks are encoded one at a time,
+    so they can come from a generator.
+
+    Args:
+        path (str): The file to write.
+        weeks (iterable): The Week objects.
+
+    Returns:
+        int: The number of weeks written.
+    """
+    index = []
+    names = []
+    names_length = 0
+    with open(path, 'wb') as f:
+        f.write(FILE_HEADER.pack(MAGIC, VERSION, 0, 0))  # Completed at the end
+        for week in weeks:
+            block = pack_week(week)
+            try:
+                start = datetime.datetime.strptime(week.start_date, "%d.%m.%Y").date().toordinal()
+            except ValueError:
+                start = 0
+            name = week.monteur.encode('utf-8')
+            index.append(INDEX_ENTRY.pack(f.tell(), len(block), start, names_length, len(name)))
+            names.append(name)
+            names_length += len(name)
+            f.write(block)
+
+        index_offset = f.tell()
+        f.write(b''.join(index + names))
+        f.seek(0)
+        f.write(FILE_HEADER.pack(MAGIC, VERSION, len(index), index_offset))
+    return len(index)
+
+
+class WeekPack:
+    """
+    Read access to a container written by write_pack. The file is memory-mapped
+    and only the index is decoded when it is opened; each week is decoded on request.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): The container file.
+
+        Raises:
+            ValueError: If the file is not a week container of a known version.
+        """
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, index_offset = FILE_HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.map.close()
+            raise ValueError(f"{path} ist kein Wochen-Paket der Version {VERSION}")
+        self.index = [INDEX_ENTRY.unpack_from(self.map, index_offset + i * INDEX_ENTRY.size) for i in range(count)]
+        self.names_offset = index_offset + count * INDEX_ENTRY.size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self.map.close()
+
+    def __len__(self):
+        return len(self.index)
+
+    def monteur(self, number):
+        """Returns the technician of a week, read from the index."""
+        name_offset, name_length = self.index[number][3:5]
+        return self.map[self.names_offset + name_offset:self.names_offset + name_offset + name_length].decode('utf-8')
+
+    def start_date(self, number):
+        """Returns the start date of a week from the index, or None."""
+        ordinal = self.index[number][2]
+        return datetime.date.fromordinal(ordinal) if ordinal else None
+
+    def find(self, monteur=None, date_from=None, date_to=None):
+        """
+        Returns the numbers of the weeks matching all given criteria, using only the index.
+
+        Args:
+            monteur (str, optional): The technician.
+            date_from, date_to (date, optional): Only weeks starting in this period.
+        """
+        return [number for number in range(len(self))
+                if (monteur is None or self.monteur(number) == monteur)
+                and (date_from is None or (self.start_date(number) or datetime.date.min) >= date_from)
+                and (date_to is None or (self.start_date(number) or datetime.date.max) <= date_to)]
+
+    def read_week(self, number):
+        """
+        Decodes a single week.
+
+        Args:
+            number (int): The position of the week in the container.
+
+        Returns:
+            Week: The week.
+        """
+        return unpack_week(self.map, self.index[number][0])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Wochen in ein kompaktes Binärformat packen")
+    parser.add_argument("pack_file", metavar="PAKET")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    pack_parser = subparsers.add_parser("pack", help="Wochen-JSON-Dateien packen")
+    pack_parser.add_argument("weeks", nargs="+", help="Verzeichnisse, Dateien oder Glob-Muster")
+    subparsers.add_parser("list", help="Gepackte Wochen auflisten")
+    unpack_parser = subparsers.add_parser("unpack", help="Eine Woche als JSON-Datei auspacken")
+    unpack_parser.add_argument("number", type=int)
+    unpack_parser.add_argument("file")
+    args = parser.parse_args()
+
+    if args.command == "pack":
+        count = write_pack(args.pack_file, (read_week(file_path) for file_path in find_week_files(args.weeks)))
+        print(f"{count} Wochen nach {args.pack_file} gepackt")
+    else:
+        with WeekPack(args.pack_file) as pack:
+            if args.command == "list":
+                for number in range(len(pack)):
+                    start_date = pack.start_date(number)
+                    print(f"{number:6d}  {start_date.strftime('%d.%m.%Y') if start_date else '?':10s}  {pack.monteur(number)}")
+            else:
+                with open(args.file, 'w', encoding='utf-8') as f:
+                    json.dump(pack.read_week(args.number).to_dict(include_meta=True), f, indent=4, ensure_ascii=False)
+                print(f"Woche {args.number} nach {args.file} ausgepackt")